@@ -1,25 +1,44 @@
 # app.py
+import atexit
+import os
+import secrets
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import numpy as np
 import pandas as pd
-import unicodedata
 from pathlib import Path
 
+from backends import make_backend
+from catalog import ID_COL, file_signature, load_catalog, load_snapshot
+from filters import HIST_BINS, RANGE_COLS
+from cards import DETAIL_PILLS, HEALTH_PILLS, card_html, nut_grid_html, pareto_badge, sparkline_html
+from images import build_image_index, data_uri, dir_signature, get_derivative, lookup
+from pareto import DEFAULT_AXES, PARETO_AXES, RANK_COL
+from perf import timings
+from prefetch import Prefetcher
+from planner import OBJECTIVES, PLAN_BUDGETS, plan
+from query import QueryCache, execute, facet_counts, make_spec, slider_histograms, split_facets
+from session_model import SessionModel, session_bytes
+from state_store import StateStore
+
 # =========================
 # 기본 설정/경로
 # =========================
 st.set_page_config(page_title="스마트컵", layout="wide")
 
-DATA_DIR = Path(__file__).parent
+DATA_DIR = Path(os.environ.get("SMARTCUP_DATA_DIR") or Path(__file__).parent)   # 벤치마크(bench/suite.py)는 합성 데이터 폴더로 바꿔 씀
 CSV_PATH = DATA_DIR / "smartcup_final_6.csv"
 IMG_DIR  = DATA_DIR / "images"   # images/{카페명}_{음료명}.jpg 또는 {카페명}_{온도} {음료명}.jpg
+SNAPSHOT_MANIFEST = DATA_DIR / "snapshots" / "current.json"   # python ingest.py 로 생성 (없으면 CSV 사용)
+STATE_DB = DATA_DIR / ".cache" / "user_state.db"   # 즐겨찾기/최근 본 음료/프리셋 (SQLite WAL)
+PERF_DIR = DATA_DIR / ".cache" / "perf"   # 단계별 시간 JSONL + Prometheus 텍스트 (perf.py)
+IMAGE_CACHE_DIR = DATA_DIR / ".cache" / "images"   # 썸네일/상세 축소본 디스크 캐시 (images.py)
+QUERY_BACKEND = os.environ.get("SMARTCUP_QUERY_BACKEND", "pandas")   # pandas | duckdb (스냅샷 Parquet 필요)
 
 # 세션 상태 초기화
 st.session_state.setdefault("page", "cover")
-st.session_state.setdefault("detail_row", None)
 st.session_state.setdefault("page_num", 1)
-st.session_state.setdefault("filters", {})         # 프리셋 저장용
-st.session_state.setdefault("recent", [])          # 최근 본 음료 (id 리스트)
-st.session_state.setdefault("favorites", set())    # 즐겨찾기 (id 집합)
 st.session_state.setdefault("_prev_q", "")         # 검색어 변경 감지
 
 # 🔽 모바일 고려해 페이지당 카드 수 축소 (6)
@@ -27,65 +46,160 @@ PAGE_SIZE = 6
 HAS_MODAL  = hasattr(st, "modal")
 HAS_DIALOG = hasattr(st, "dialog")
 
+# =========================
+# 사용자 상태 (익명 토큰 → SQLite, 재접속해도 유지)
+# =========================
+@st.cache_resource(show_spinner=False, on_release=lambda s: s.close())
+def get_state_store() -> StateStore:
+    """
+    프로세스당 하나: 모든 세션이 연결/쓰기 스레드/LRU 를 공유.
+    캐시를 비울 때 close (남은 쓰기 반영 — 벤치마크처럼 데이터 폴더를 곧 지우는 경우에도 안전)
+    """
+    return StateStore(STATE_DB)
+
+def _user_token() -> str:
+    """
+    URL ?u= 의 익명 토큰 (없으면 새로 발급해서 URL 에 기록 → 새로고침/재접속 시 재사용).
+    주의: 토큰이 곧 사용자 — ?u= 가 붙은 링크를 받은 사람은 보낸 사람의 즐겨찾기/최근 본 음료/프리셋을
+    보고 바꿀 수 있음 (공유할 때는 ?u= 를 지운 링크를 보내야 함)
+    """
+    token = st.query_params.get("u")
+    if not token:
+        token = secrets.token_urlsafe(12)
+        st.query_params["u"] = token
+    return token
+
+def persist_state(*fields):
+    """세션 상태 일부를 저장 대기열에 넣음 (DB 쓰기는 백그라운드에서 모아서)"""
+    user = st.session_state.user
+    get_state_store().save(st.session_state.user_token,
+                           **{f: user.export(f) if f in SessionModel.PERSISTED else st.session_state[f]
+                              for f in fields})
+
+if "user_token" not in st.session_state:
+    st.session_state.user_token = _user_token()
+    _saved = get_state_store().load(st.session_state.user_token)
+    st.session_state.filters = _saved["filters"]        # 프리셋 저장용
+    st.session_state.user = SessionModel.from_saved(_saved)   # 즐겨찾기 비트셋/최근 본 링 버퍼/상세 모달 id
+
 # =========================
 # 유틸
 # =========================
-def safe_filename(text: str) -> str:
-    return str(text).replace(" ", "_").replace("/", "-").replace("\\", "-").strip()
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_catalog_cached(path: str, signature: tuple):
+    """세션 간 공유 카탈로그. signature(mtime/size)가 바뀌면 새로 로딩"""
+    return load_catalog(Path(path))
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_snapshot_cached(manifest: str, signature: tuple):
+    """ingest 스냅샷을 memory-map: 워커 프로세스끼리 페이지 공유, CSV 파싱 없음"""
+    return load_snapshot(Path(manifest))
+
+def get_catalog():
+    # CSV 를 ingest 이후에 고쳤다면(스냅샷이 더 오래됨) CSV 로 되돌아감
+    snap_sig = file_signature(SNAPSHOT_MANIFEST)
+    csv_sig = file_signature(CSV_PATH)
+    if snap_sig[0] and snap_sig[0] >= csv_sig[0]:
+        return _load_snapshot_cached(str(SNAPSHOT_MANIFEST), snap_sig)
+    return _load_catalog_cached(str(CSV_PATH), csv_sig)
+
+@st.cache_resource(show_spinner=False)
+def get_perf_output():
+    """단계별 시간 → .cache/perf/timings.jsonl + metrics.prom (프로세스당 한 번 설정, 종료 시 남은 것 기록)"""
+    timings.configure(PERF_DIR)
+    atexit.register(timings.flush)
+    return timings
+
+def render_perf_panel():
+    """?debug=1 일 때만: 단계별 last/p50/p95 (ms) — 평소에는 분위수도 계산하지 않음"""
+    with st.sidebar.expander("⏱ 단계별 시간 (ms)", expanded=True):
+        summary = timings.summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary).T.round(2), use_container_width=True)
+        nbytes = session_bytes(st.session_state)
+        st.caption(f"세션 상태 {nbytes:,} B (세션 1,000 개 ≈ {nbytes * 1000 / 2**20:.1f} MB)")
+        pf = get_prefetcher().stats()
+        st.caption(f"프리페치: 완료 {pf['done']} · 취소 {pf['cancelled']} · 버림 {pf['dropped']} · "
+                   f"페이지 적중 {pf['page_hits']} · 대기 {pf['pending']}")
+        st.caption(f"JSONL/Prometheus: {PERF_DIR}")
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache() -> QueryCache:
+    """프로세스 전체 공유 질의 결과 캐시 (카탈로그 버전이 바뀌면 스스로 비움)"""
+    return QueryCache()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _backend_cached(version: str, name: str):
+    return make_backend(name, get_catalog(), SNAPSHOT_MANIFEST, cache=get_query_cache())
+
+def get_backend():
+    """검색/필터/정렬/페이지 질의 백엔드 (카탈로그 버전마다 하나, 세션 간 공유)"""
+    return _backend_cached(get_catalog().version, QUERY_BACKEND)
+
+@st.cache_resource(show_spinner=False, on_release=lambda p: p.shutdown(wait=True))
+def get_prefetcher() -> Prefetcher:
+    """
+    다음 페이지/상세 이미지를 유휴 시간에 미리 준비하는 스레드 풀 (프로세스당 하나, 세션 간 공유).
+    캐시를 비울 때는 도는 작업이 끝날 때까지 기다림 (데이터 폴더의 이미지 캐시에 쓰는 중일 수 있음)
+    """
+    prefetcher = Prefetcher()
+    atexit.register(prefetcher.shutdown)
+    return prefetcher
+
+# --- 이미지 탐색: 폴더 인덱스(정규화 스템 → 경로) 기반 O(1) 조회 ---
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _image_index_cached(img_dir: str, signature: int):
+    """세션 간 공유 이미지 인덱스. 폴더 mtime 이 바뀌면 다시 순회"""
+    return build_image_index(Path(img_dir))
 
-def _norm_key(s: str) -> str:
-    """검색/파일명 비교용: 한글 포함 공백/언더스코어/하이픈 제거 + 소문자 + 유니코드 정규화"""
-    s = unicodedata.normalize("NFKC", str(s or ""))
-    s = s.lower().strip()
-    return s.replace(" ", "").replace("_", "").replace("-", "")
+def get_image_index() -> dict:
+    return _image_index_cached(str(IMG_DIR), dir_signature(IMG_DIR))
 
-# --- 교체된 이미지 탐색 함수 ---
 def find_image_path(cafe: str, name: str, temp: str = ""):
     """
-    images/ 폴더에서 실제 파일들을 순회하며 느슨하게 매칭:
-    - 후보: 1) Cafe_Name, 2) Cafe_Temp Name
+    images/ 폴더 인덱스에서 느슨하게 매칭:
+    - 후보: 1) Cafe_Name, 2) Cafe_Temp Name (+ 각각 safe_filename 버전)
     - 비교 시 공백/밑줄/하이픈 제거, 소문자화, 유니코드 정규화
     - 확장자 대/소문자 허용 (.jpg/.jpeg/.png)
     """
-    cafe_raw = str(cafe or "").strip()
-    name_raw = str(name or "").strip()
-    temp_raw = str(temp or "").strip()
-
-    candidate_stems = [f"{cafe_raw}_{name_raw}"]
-    if temp_raw:
-        candidate_stems.append(f"{cafe_raw}_{temp_raw} {name_raw}")
-
-    cand_keys = [_norm_key(stem) for stem in candidate_stems]
-
-    allow_ext = {".jpg", ".jpeg", ".png", ".JPG", ".JPEG", ".PNG"}
-
-    if not IMG_DIR.exists():
-        return None
+    with timings.stage("image_lookup"):
+        return lookup(get_image_index(), cafe, name, temp)
 
-    # 1차: 원문 스템 기반
-    for p in IMG_DIR.iterdir():
-        if not p.is_file() or p.suffix not in allow_ext:
-            continue
-        if _norm_key(p.stem) in cand_keys:
-            return p
-
-    # 2차: safe_filename 버전
-    cafe_s = safe_filename(cafe_raw)
-    name_s = safe_filename(name_raw)
-    temp_s = safe_filename(temp_raw) if temp_raw else ""
-
-    candidate_stems2 = [f"{cafe_s}_{name_s}"]
-    if temp_s:
-        candidate_stems2.append(f"{cafe_s}_{temp_s}_{name_s}")
+def schedule_prefetch(catalog, backend, spec, favorites, start: int, total: int, page_df: pd.DataFrame):
+    """
+    화면을 다 그린 뒤 유휴 시간 작업 예약: 다음 페이지 행 + 썸네일, 보이는 카드마다 상세 이미지 축소본.
+    필터/정렬/페이지 상태가 바뀌면 Prefetcher 가 이전 예약을 취소.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    prefetcher = get_prefetcher()
+    index = get_image_index()   # 워커 스레드에서는 st 캐시 함수를 부르지 않도록 미리 꺼내 둠
+    session, state = ctx.session_id, (catalog.version, spec, start)
+
+    def warm(frame, size):
+        for cafe, name, temp in zip(frame["Cafe"], frame["Name"], frame["Temperature"]):
+            if not prefetcher.current(session, state):
+                return
+            path = lookup(index, cafe, name, temp)
+            if path is None:
+                continue
+            if size == "thumb":
+                data_uri(path, "thumb", IMAGE_CACHE_DIR)
+            else:
+                get_derivative(path, size, IMAGE_CACHE_DIR)
 
-    cand_keys2 = [_norm_key(stem) for stem in candidate_stems2]
-    for p in IMG_DIR.iterdir():
-        if not p.is_file() or p.suffix not in allow_ext:
-            continue
-        if _norm_key(p.stem) in cand_keys2:
-            return p
+    def next_page():
+        key = (catalog.version, spec, start + PAGE_SIZE, PAGE_SIZE)
+        if prefetcher.has_page(key):
+            return
+        frame = backend.page(spec, favorites, start + PAGE_SIZE, PAGE_SIZE)
+        prefetcher.put_page(key, frame)
+        warm(frame, "thumb")
 
-    return None
+    jobs = [next_page] if start + PAGE_SIZE < total else []
+    jobs += [lambda i=i: warm(page_df.iloc[i:i + 1], "detail") for i in range(len(page_df))]
+    prefetcher.schedule(session, state, jobs)
 
 
 def format_title(cafe: str, temp: str, name: str) -> str:
@@ -95,32 +209,29 @@ def format_title(cafe: str, temp: str, name: str) -> str:
     prefix = "" if starts_with_temp else (temp.strip() + " ") if temp else ""
     return f"{cafe}: {prefix}{nm}".strip()
 
-def make_item_id(row: pd.Series) -> str:
-    return f"{row['Cafe']}||{row['Name']}"
+def make_item_id(row: pd.Series) -> int:
+    return int(row[ID_COL])
 
-def mark_as_viewed(item_id: str):
-    rec = list(st.session_state.recent)
-    if item_id in rec:
-        rec.remove(item_id)
-    rec.insert(0, item_id)
-    st.session_state.recent = rec[:20]
+def mark_as_viewed(item_id: int):
+    st.session_state.user.recent.push(item_id)
+    persist_state("recent")
 
-def toggle_fav(item_id: str):
-    fav = set(st.session_state.favorites)
-    if item_id in fav:
-        fav.remove(item_id)
-    else:
-        fav.add(item_id)
-    st.session_state.favorites = fav
+def toggle_fav(item_id: int):
+    st.session_state.user.favorites.toggle(item_id)
+    persist_state("favorites")
 
 def close_and_rerun():
     """모바일에서 모달이 안닫히는 케이스 방지용"""
-    st.session_state.detail_row = None
+    st.session_state.user.detail = -1
     try:
         st.rerun()
     except:
         pass
 
+def show_detail(item_id: int):
+    """상세 모달 안에서 다른 음료로 전환 (버튼 콜백 → 다음 rerun 에 그 음료 모달)"""
+    st.session_state.user.detail = item_id
+
 # =========================
 # 표지 페이지
 # =========================
@@ -167,11 +278,72 @@ def render_cover():
         if st.button("🚀 시작하기", key="start_btn"):
             st.session_state.page = "main"
 
+# =========================
+# 하루 섭취 플래너
+# =========================
+def render_planner(catalog, filter_spec, favorites):
+    """현재 필터 결과를 후보로, 하루 예산 안에서 선호 점수 합이 큰 k 잔 조합 상위 5개"""
+    budget_cols = st.columns(len(PLAN_BUDGETS))
+    limits = []
+    for box, (label, col, unit, default) in zip(budget_cols, PLAN_BUDGETS):
+        with box:
+            limits.append(int(st.number_input(f"{label} ({unit}) 이하", min_value=0, value=default,
+                                              step=max(1, default // 20), key=f"plan_{col}")))
+    c1, c2 = st.columns(2)
+    with c1:
+        k = st.number_input("잔 수", min_value=1, max_value=4, value=2, step=1, key="plan_k")
+    with c2:
+        objective = st.selectbox("무엇을 우선할까요?", list(OBJECTIVES), key="plan_obj")
+
+    df = catalog.df
+    score_col, sign = OBJECTIVES[objective]
+
+    key = (filter_spec, tuple(limits), int(k), objective)
+    computed = {}
+
+    def compute():
+        pool = get_query_cache().get_or_compute(
+            catalog.version, filter_spec, lambda: execute(catalog, filter_spec, favorites)
+        )
+        values = df[[col for _, col, _, _ in PLAN_BUDGETS]].to_numpy()[pool]
+        combos, _, exact = plan(values, limits, sign * df[score_col].to_numpy(np.float64)[pool], int(k))
+        computed["exact"] = np.array([exact])
+        return pool[combos]
+
+    def compute_exact():
+        if "exact" not in computed:   # 플래그만 캐시에서 밀려난 경우 다시 탐색
+            compute()
+        return computed["exact"]
+
+    combos = get_query_cache().get_or_compute(catalog.version, ("plan",) + key, compute)
+    exact = bool(get_query_cache().get_or_compute(catalog.version, ("plan_exact",) + key, compute_exact)[0])
+    if not exact:
+        st.caption("⚠️ 후보가 많아 탐색 한도에서 멈췄습니다. 결과가 최적이 아니거나 빠진 조합이 있을 수 있어요. 필터로 후보를 줄이면 정확해집니다.")
+    if not len(combos):
+        st.info("예산 안에서 고를 수 있는 조합이 없습니다. 예산을 늘리거나 필터를 풀어보세요.")
+        return
+    lines = []
+    for n, combo in enumerate(combos, 1):
+        rows = df.iloc[combo]
+        names = " + ".join(
+            format_title(str(cafe), str(temp), str(name))
+            for cafe, temp, name in zip(rows["Cafe"], rows["Temperature"], rows["Name"])
+        )
+        totals = " · ".join(f"{label} {int(rows[col].sum()):,}{unit}" for label, col, unit, _ in PLAN_BUDGETS)
+        lines.append(f"{n}. **{names}**  \n   {totals}")
+    st.markdown("\n".join(lines))
+
 # =========================
 # 메인(필터 + 정렬 + 카드 + 상세)
 # =========================
 def render_main():
-    df = pd.read_csv(CSV_PATH)
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_prefetcher().cancel(ctx.session_id)   # 새 동작: 이 세션의 지난 프리페치는 멈춤 (끝에서 다시 예약)
+    with timings.stage("catalog"):
+        catalog = get_catalog()
+    df = catalog.df
+    bounds = catalog.bounds
 
     # ===== 전역 스타일 보강 (간격/배지/온도 색상/카드 크기 + 모달 커스텀 + 타이틀 강조) =====
     st.markdown("""
@@ -225,6 +397,24 @@ def render_main():
     .temp-ice{ background:#e6f3ff !important; }
     .temp-etc{ background:#f3f4f6 !important; }
 
+    /* 카드: 본문은 HTML 한 덩어리(cards.card_html), 버튼만 위젯 */
+    .sc-card{
+      border:1px solid rgba(49,51,63,0.2);
+      border-radius:8px;
+      padding:12px 14px;
+      margin-bottom:6px;
+    }
+    .card-thumb{
+      display:block; width:100%; max-height:220px; object-fit:cover;
+      border-radius:6px; margin-bottom:8px;
+    }
+
+    /* 사이드바 슬라이더 아래 히스토그램 (cards.sparkline_html) */
+    .spark{ display:flex; align-items:flex-end; gap:1px; height:28px; margin:-10px 0 2px 0; }
+    .spark i{ flex:1; background:#d1d5db; border-radius:1px 1px 0 0; }
+    .spark i.on{ background:#6366f1; }
+    .spark-cap{ font-size:12px; color:#6b7280; margin-bottom:6px; }
+
     /* 가격 강조(카드) */
     .price{ font-size:20px; font-weight:600; }
 
@@ -266,10 +456,6 @@ def render_main():
     </style>
     """, unsafe_allow_html=True)
 
-    # ===== 검색: 띄어쓰기/하이픈/언더스코어 무시 =====
-    for col in ["Name", "Cafe", "Category"]:
-        df[f"{col}__norm"] = df[col].astype(str).map(_norm_key)
-
     left, right = st.columns([5, 2])
     with left:
         st.markdown(
@@ -289,7 +475,7 @@ def render_main():
             key="search_q",
             placeholder="🔎 음료명/카페/카테고리 검색",
             label_visibility="collapsed",
-            help="예) 라떼, 투썸, 프라푸치노"
+            help="예) 라떼, 투썸, 프라푸치노, ㅇㅁㄹㅋㄴ(초성)"
         )
         if st.session_state._prev_q != q:
             st.session_state.page_num = 1
@@ -304,86 +490,118 @@ def render_main():
     with c1:
         if st.button("🔥 저칼로리", use_container_width=True, key="preset_lowcal"):
             st.session_state.filters = {"calorie_max": 120}
+            persist_state("filters")
     with c2:
         if st.button("🍬 당 줄이기", use_container_width=True, key="preset_lowsugar"):
             st.session_state.filters = {"sugar_g_max": 10}
+            persist_state("filters")
     with c3:
         if st.button("☕ 카페인 줄이기", use_container_width=True, key="preset_lowcaf"):
             st.session_state.filters = {"caffeine_mg_max": 50}
+            persist_state("filters")
 
     st.sidebar.header("🧰 필터링 MODE")
-    all_cafes = sorted(df["Cafe"].unique())
-    all_cats  = sorted(df["Category"].unique())
-    all_temps = sorted(df["Temperature"].unique())
-
-    cafes_all_toggle = st.sidebar.checkbox("카페 전체 보기", value=True)
-    selected_cafes = all_cafes if cafes_all_toggle else st.sidebar.multiselect("카페 선택 (복수 가능)", options=all_cafes, default=[])
-    cats_all_toggle = st.sidebar.checkbox("카테고리 전체 보기", value=True)
-    selected_category = all_cats if cats_all_toggle else st.sidebar.multiselect("카테고리 선택 (복수 가능)", options=all_cats, default=[])
-    selected_temp = st.sidebar.selectbox("온도", ["전체"] + all_temps)
-
-    # 프리셋 기본값 반영
-    cal_max = st.session_state.filters.get("calorie_max", int(df["Calories (kcal)"].max()))
-    sug_max = st.session_state.filters.get("sugar_g_max",   int(df["Sugar (g)"].max()))
-    caf_max = st.session_state.filters.get("caffeine_mg_max", int(df["Caffeine (mg)"].max()))
-
-    calories = st.sidebar.slider("칼로리 (kcal)", 0, int(df["Calories (kcal)"].max()), (0, cal_max))
-    caffeine = st.sidebar.slider("카페인 (mg)", 0, int(df["Caffeine (mg)"].max()), (0, caf_max))
-    sugar    = st.sidebar.slider("당류 (g)",     0, int(df["Sugar (g)"].max()),    (0, sug_max))
-    fat      = st.sidebar.slider("지방 (g)",     0, int(df["Fat (g)"].max()),      (0, int(df["Fat (g)"].max())))
-    sodium   = st.sidebar.slider("나트륨 (mg)",  0, int(df["Sodium (mg)"].max()),  (0, int(df["Sodium (mg)"].max())))
-    price    = st.sidebar.slider("가격 (원)",     0, int(df["Price (KRW)"].max()),  (0, int(df["Price (KRW)"].max())))
+    all_cafes = catalog.cafes
+    all_cats  = catalog.categories
+    all_temps = catalog.temps
+
+    # 카페/카테고리/온도: 옵션 옆 결과 수는 슬라이더 값이 필요하므로 자리만 잡아 두고 슬라이더 다음에 채움
+    facet_box = st.sidebar.container()
+
+    # 프리셋 기본값 반영 (슬라이더 상한은 로딩 시 미리 계산)
+    cal_max = st.session_state.filters.get("calorie_max", bounds["Calories (kcal)"])
+    sug_max = st.session_state.filters.get("sugar_g_max",   bounds["Sugar (g)"])
+    caf_max = st.session_state.filters.get("caffeine_mg_max", bounds["Caffeine (mg)"])
+
+    # 슬라이더마다 아래에 히스토그램 자리 (다른 슬라이더 값까지 알아야 하므로 나중에 채움)
+    spark = {}
+    calories = st.sidebar.slider("칼로리 (kcal)", 0, bounds["Calories (kcal)"], (0, cal_max))
+    spark["Calories (kcal)"] = st.sidebar.empty()
+    caffeine = st.sidebar.slider("카페인 (mg)", 0, bounds["Caffeine (mg)"], (0, caf_max))
+    spark["Caffeine (mg)"] = st.sidebar.empty()
+    sugar    = st.sidebar.slider("당류 (g)",     0, bounds["Sugar (g)"],    (0, sug_max))
+    spark["Sugar (g)"] = st.sidebar.empty()
+    fat      = st.sidebar.slider("지방 (g)",     0, bounds["Fat (g)"],      (0, bounds["Fat (g)"]))
+    spark["Fat (g)"] = st.sidebar.empty()
+    sodium   = st.sidebar.slider("나트륨 (mg)",  0, bounds["Sodium (mg)"],  (0, bounds["Sodium (mg)"]))
+    spark["Sodium (mg)"] = st.sidebar.empty()
+    price    = st.sidebar.slider("가격 (원)",     0, bounds["Price (KRW)"],  (0, bounds["Price (KRW)"]))
+    spark["Price (KRW)"] = st.sidebar.empty()
 
     fav_only = st.sidebar.checkbox("⭐ 즐겨찾기만 보기", value=False)
+    favorites = st.session_state.user.favorites.ids() if fav_only else None
+
+    # ===== 필터링: 행 위치 기반 (조건별 마스크 캐시 + AND, 프레임 복사 없음) =====
+    ranges = {
+        "Calories (kcal)": calories,
+        "Caffeine (mg)": caffeine,
+        "Sugar (g)": sugar,
+        "Fat (g)": fat,
+        "Sodium (mg)": sodium,
+        "Price (KRW)": price,
+    }
+
+    # ===== 패싯 개수: 각 패싯은 자기 선택만 빼고 나머지 조건 적용 (마스크 캐시 AND + bincount) =====
+    # 다른 패싯의 선택은 위젯보다 먼저 필요하므로 지난 rerun 까지의 위젯 상태(session_state)에서 읽음
+    ss = st.session_state
+    facet_spec = make_spec(
+        catalog, q=q, ranges=ranges, favorites=favorites,
+        cafes=None if ss.get("cafes_all", True) else ss.get("sel_cafes"),
+        categories=None if ss.get("cats_all", True) else ss.get("sel_cats"),
+        temp=None if ss.get("sel_temp", "전체") == "전체" else ss.get("sel_temp"),
+    )
+    with timings.stage("facets"):
+        counts = split_facets(catalog, get_query_cache().get_or_compute(
+            catalog.version, ("facets", facet_spec), lambda: facet_counts(catalog, facet_spec, favorites)
+        ))
+    temp_total = sum(counts["Temperature"].values())
+
+    with facet_box:
+        cafes_all_toggle = st.checkbox("카페 전체 보기", value=True, key="cafes_all")
+        selected_cafes = all_cafes if cafes_all_toggle else st.multiselect(
+            "카페 선택 (복수 가능)", options=all_cafes, default=[], key="sel_cafes",
+            format_func=lambda v: f"{v} ({counts['Cafe'].get(v, 0)})")
+        cats_all_toggle = st.checkbox("카테고리 전체 보기", value=True, key="cats_all")
+        selected_category = all_cats if cats_all_toggle else st.multiselect(
+            "카테고리 선택 (복수 가능)", options=all_cats, default=[], key="sel_cats",
+            format_func=lambda v: f"{v} ({counts['Category'].get(v, 0)})")
+        selected_temp = st.selectbox(
+            "온도", ["전체"] + all_temps, key="sel_temp",
+            format_func=lambda v: f"{v} ({temp_total if v == '전체' else counts['Temperature'].get(v, 0)})")
+
+    # ===== 슬라이더 히스토그램: 자기 범위만 빼고 나머지 조건을 적용한 분포 (고정 구간 bincount) =====
+    filter_spec = make_spec(   # 정렬 없는 현재 조건 (히스토그램/플래너 후보)
+        catalog, q=q, cafes=selected_cafes, categories=selected_category,
+        temp=None if selected_temp == "전체" else selected_temp, ranges=ranges, favorites=favorites,
+    )
+    with timings.stage("histograms"):
+        hists = get_query_cache().get_or_compute(
+            catalog.version, ("hists", filter_spec), lambda: slider_histograms(catalog, filter_spec, favorites)
+        )
+    for i, col in enumerate(RANGE_COLS):
+        lo, hi = ranges[col]
+        spark[col].markdown(
+            sparkline_html(hists[i, :HIST_BINS], catalog.filters.bin_edges[col], lo, hi,
+                           int(hists[i, HIST_BINS]), int(hists[i, :HIST_BINS].sum())),
+            unsafe_allow_html=True,
+        )
 
     with st.sidebar.expander("⭐ 즐겨찾기"):
-        if st.session_state.favorites:
-            for iid in list(st.session_state.favorites)[:8]:
-                cafe, name = iid.split("||", 1)
+        fav_pos = catalog.positions_of(st.session_state.user.favorites.ids()[:8])
+        if len(fav_pos):
+            for cafe, name in zip(df["Cafe"].iloc[fav_pos], df["Name"].iloc[fav_pos]):
                 st.caption(f"- {cafe} | {name}")
         else:
             st.caption("아직 없음")
 
     with st.sidebar.expander("🕘 최근 본 음료"):
-        if st.session_state.recent:
-            for iid in st.session_state.recent[:8]:
-                cafe, name = iid.split("||", 1)
+        rec_pos = catalog.positions_of(st.session_state.user.recent.ids()[:8])
+        if len(rec_pos):
+            for cafe, name in zip(df["Cafe"].iloc[rec_pos], df["Name"].iloc[rec_pos]):
                 st.caption(f"- {cafe} | {name}")
         else:
             st.caption("아직 없음")
 
-    # ===== 필터링 =====
-    filtered = df.copy()
-
-    if q:
-        q_norm = _norm_key(q)
-        mask_q = (
-            filtered["Name__norm"].str.contains(q_norm, na=False) |
-            filtered["Cafe__norm"].str.contains(q_norm, na=False) |
-            filtered["Category__norm"].str.contains(q_norm, na=False)
-        )
-        filtered = filtered[mask_q]
-
-    if selected_cafes:
-        filtered = filtered[filtered["Cafe"].isin(selected_cafes)]
-    if selected_category:
-        filtered = filtered[filtered["Category"].isin(selected_category)]
-    if selected_temp != "전체":
-        filtered = filtered[filtered["Temperature"] == selected_temp]
-
-    filtered = filtered[
-        filtered["Calories (kcal)"].between(*calories) &
-        filtered["Caffeine (mg)"].between(*caffeine) &
-        filtered["Sugar (g)"].between(*sugar) &
-        filtered["Fat (g)"].between(*fat) &
-        filtered["Sodium (mg)"].between(*sodium) &
-        filtered["Price (KRW)"].between(*price)
-    ]
-
-    if fav_only:
-        filtered_ids = filtered.apply(make_item_id, axis=1)
-        mask = filtered_ids.isin(st.session_state.favorites)
-        filtered = filtered[mask]
 
     # ===== 결과 + 정렬 =====
     st.markdown('<h3 class="section-title">결과</h3>', unsafe_allow_html=True)
@@ -395,40 +613,76 @@ def render_main():
         "지방 낮은 순",
         "카페인 낮은 순",
         "나트륨 낮은 순",
+        "검색 관련도 순",
+        "가성비 순 (파레토)",
     ]
     sort_key = st.selectbox("정렬 기준", sort_options, key="sort_key")
+    # (컬럼, 오름차순) 키 목록 — 앞쪽 우선. 순열은 카탈로그 로딩 시 계산/공유
     sort_map = {
-        "칼로리 낮은 순": ("Calories (kcal)", True),
-        "가격 낮은 순": ("Price (KRW)", True),
-        "당류 낮은 순": ("Sugar (g)", True),
-        "지방 낮은 순": ("Fat (g)", True),
-        "카페인 낮은 순": ("Caffeine (mg)", True),
-        "나트륨 낮은 순": ("Sodium (mg)", True),
+        "칼로리 낮은 순": (("Calories (kcal)", True),),
+        "가격 낮은 순": (("Price (KRW)", True),),
+        "당류 낮은 순": (("Sugar (g)", True),),
+        "지방 낮은 순": (("Fat (g)", True),),
+        "카페인 낮은 순": (("Caffeine (mg)", True),),
+        "나트륨 낮은 순": (("Sodium (mg)", True),),
+        "검색 관련도 순": (),   # 검색 결과 순서 유지 (검색어 없으면 기본 순서)
+        "가성비 순 (파레토)": (),   # 아래 pareto_axes 로 지배 순위 순
     }
-    sort_col, asc = sort_map[sort_key]
-    filtered = filtered.sort_values(sort_col, ascending=asc)
+    sort_keys = sort_map[sort_key]
+
+    # 파레토 모드: 고른 축 모두에서 다른 음료에 밀리지 않는 음료가 먼저 (지배 순위 순)
+    pareto_axes = ()
+    if sort_key == "가성비 순 (파레토)":
+        axis_label = {col: label for label, col in PARETO_AXES}
+        pareto_axes = st.multiselect(
+            "비교 기준 (모두 낮을수록 좋음)", list(axis_label), default=list(DEFAULT_AXES),
+            format_func=axis_label.get, key="pareto_axes",
+        )
 
-    st.markdown(f"🔎 **{len(filtered)}개 음료가 조건에 부합합니다.**")
+    # 같은 조건(프리셋/기본 화면/인기 검색어)은 세션 간 공유 캐시에서 바로 꺼냄
+    spec = make_spec(
+        catalog, q=q, cafes=selected_cafes, categories=selected_category,
+        temp=None if selected_temp == "전체" else selected_temp,
+        ranges=ranges, sort_keys=sort_keys, favorites=favorites, pareto=pareto_axes,
+    )
+    backend = get_backend()
+    with timings.stage("query"):
+        total = backend.count(spec, favorites)
 
-    with st.expander("결과 펼쳐보기"):
-        if "Cafe" in filtered.columns:
-            cols = ["Cafe"] + [c for c in filtered.columns if c != "Cafe"]
-            preview_df = filtered[cols].reset_index(drop=True)
-        else:
-            preview_df = filtered.reset_index(drop=True)
-        st.dataframe(preview_df, use_container_width=True)
+    if st.query_params.get("debug"):
+        st.sidebar.caption(f"query backend: {backend.name} · {backend.stats()}")
+
+    st.markdown(f"🔎 **{total}개 음료가 조건에 부합합니다.**")
+
+    # 전체 결과 표는 켰을 때만 만듦 (접힌 expander 도 매 rerun 전체 프레임을 전송하므로)
+    if st.toggle("결과 펼쳐보기", key="show_table"):
+        shown = [c for c in df.columns if not c.endswith("__norm") and c != ID_COL]
+        cols = ["Cafe"] + [c for c in shown if c != "Cafe"] + ([RANK_COL] if pareto_axes else [])
+        with timings.stage("table"):
+            preview_df = backend.page(spec, favorites)[cols].reset_index(drop=True)
+            st.dataframe(preview_df, use_container_width=True)
 
-    # ===== 페이지네이션 =====
+    # 하루 섭취 플래너 (켰을 때만: 예산/잔 수/우선순위 → 분기 한정 탐색, 결과는 공유 캐시)
+    if st.toggle("🧮 하루 섭취 플래너", key="show_planner"):
+        with timings.stage("planner"):
+            render_planner(catalog, filter_spec, favorites)
+
+    # ===== 페이지네이션: 보이는 PAGE_SIZE 행만 백엔드에서 꺼냄 =====
     st.markdown("---")
-    total = len(filtered)
     pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
     st.session_state.page_num = min(max(1, st.session_state.page_num), pages)
     start = (st.session_state.page_num - 1) * PAGE_SIZE
-    end = start + PAGE_SIZE
-    page_df = filtered.iloc[start:end].reset_index(drop=True)
+    with timings.stage("page"):
+        page_df = get_prefetcher().take_page((catalog.version, spec, start, PAGE_SIZE))
+        if page_df is None:
+            page_df = backend.page(spec, favorites, start, PAGE_SIZE)
 
     # ===== 상세 모달 =====
     def detail_body(row: pd.Series):
+        with timings.stage("detail"):
+            _detail_body(row)
+
+    def _detail_body(row: pd.Series):
         item_id = make_item_id(row)
         mark_as_viewed(item_id)
 
@@ -442,7 +696,7 @@ def render_main():
         col1, col2 = st.columns([1,1])
         with col1:
             if img_path:
-                st.image(str(img_path), caption=row["Name"], use_container_width=True)
+                st.image(str(get_derivative(img_path, "detail", IMAGE_CACHE_DIR)), caption=row["Name"], use_container_width=True)
             else:
                 st.info("이미지가 없습니다. (images/ 폴더에 {카페명}_{음료명}.jpg 또는 {카페명}_{온도} {음료명}.jpg 저장)")
 
@@ -463,24 +717,29 @@ def render_main():
             st.markdown("</div>", unsafe_allow_html=True)
 
         # 성분칩 2열×3행
-        cal = int(row['Calories (kcal)'])
-        sug = int(row['Sugar (g)'])
-        caf = int(row['Caffeine (mg)'])
-        sod = int(row['Sodium (mg)'])
-        fat = int(row['Fat (g)'])
-        vol = int(row['Volume (ml)'])
-
-        pills_html = f"""
-        <div class='nut-grid'>
-          <div class='pill'><span class='k'>칼로리:</span> <span class='v'>{cal}</span> <span class='u'>kcal</span></div>
-          <div class='pill'><span class='k'>당:</span> <span class='v'>{sug}</span> <span class='u'>g</span></div>
-          <div class='pill'><span class='k'>카페인:</span> <span class='v'>{caf}</span> <span class='u'>mg</span></div>
-          <div class='pill'><span class='k'>나트륨:</span> <span class='v'>{sod}</span> <span class='u'>mg</span></div>
-          <div class='pill'><span class='k'>지방:</span> <span class='v'>{fat}</span> <span class='u'>g</span></div>
-          <div class='pill'><span class='k'>용량:</span> <span class='v'>{vol}</span> <span class='u'>ml</span></div>
-        </div>
-        """
-        st.markdown(pills_html, unsafe_allow_html=True)
+        st.markdown(nut_grid_html(row, DETAIL_PILLS), unsafe_allow_html=True)
+
+        # 비슷하지만 더 가벼운 음료 (카탈로그 로딩 시 만든 KD-tree 조회, 클릭 시 그 음료 상세로)
+        pos = catalog.positions_of([item_id])
+        with timings.stage("similar"):
+            alts = catalog.similar.healthier(int(pos[0]), k=3) if len(pos) else []
+        if len(alts):
+            st.markdown(
+                "<div class='detail-meta-line mt-8'><span class='meta-label'>🌿 비슷하지만 더 가벼운 음료</span></div>",
+                unsafe_allow_html=True)
+            for alt_pos in alts:
+                alt = df.iloc[alt_pos]
+                diffs = " · ".join(
+                    f"{label} {int(alt[col]) - int(row[col]):+d}{unit}"
+                    for label, col, unit in HEALTH_PILLS if int(alt[col]) != int(row[col])
+                )
+                label = format_title(str(alt["Cafe"]), str(alt["Temperature"]), str(alt["Name"]))
+                st.button(
+                    f"{label}  ({diffs})" if diffs else label,
+                    key=f"alt_{item_id}_{make_item_id(alt)}",
+                    on_click=show_detail, args=(make_item_id(alt),),
+                    use_container_width=True,
+                )
 
         st.divider()
         st.caption("Tip: 슬라이더를 조절해 더 깐깐하게 필터링해보세요!")
@@ -503,69 +762,60 @@ def render_main():
             st.button("확인", on_click=close_and_rerun)
 
     # ===== 카드 리스트 =====
-    cols_per_row = 3
-    rows = (len(page_df) + cols_per_row - 1) // cols_per_row
-    for r in range(rows):
-        cols = st.columns(cols_per_row)
-        for c in range(cols_per_row):
-            i = r * cols_per_row + c
-            if i >= len(page_df):
-                continue
-
-            row = page_df.iloc[i]
-            item_id = make_item_id(row)
-            is_fav = item_id in st.session_state.favorites
-            title_text = format_title(str(row['Cafe']), str(row['Temperature']), str(row['Name']))
-
-            with cols[c]:
-                with st.container(border=True):
-                    top_left, top_right = st.columns([1, 0.15])
-                    with top_left:
-                        st.markdown(f"<div class='card-title'>{title_text}</div>", unsafe_allow_html=True)
-                    with top_right:
+    with timings.stage("cards"):
+        cols_per_row = 3
+        rows = (len(page_df) + cols_per_row - 1) // cols_per_row
+        for r in range(rows):
+            cols = st.columns(cols_per_row)
+            for c in range(cols_per_row):
+                i = r * cols_per_row + c
+                if i >= len(page_df):
+                    continue
+
+                row = page_df.iloc[i]
+                item_id = make_item_id(row)
+                is_fav = item_id in st.session_state.user.favorites
+                title_text = format_title(str(row['Cafe']), str(row['Temperature']), str(row['Name']))
+
+                img_path = find_image_path(row["Cafe"], row["Name"], row["Temperature"])
+                thumb_uri = data_uri(img_path, "thumb", IMAGE_CACHE_DIR) if img_path else None
+
+                with cols[c]:
+                    # 카드 본문은 markdown 한 번, 버튼 두 개만 위젯
+                    badge = pareto_badge(int(row[RANK_COL])) if pareto_axes else None
+                    st.markdown(card_html(title_text, row, thumb_uri, badge), unsafe_allow_html=True)
+                    star_col, btn_col = st.columns([0.3, 1])
+                    with star_col:
                         if st.button("⭐" if is_fav else "☆", key=f"favstar_{item_id}", help="즐겨찾기"):
                             toggle_fav(item_id)
                             st.rerun()
-
-                    st.markdown(
-                        f"<div class='meta mt-8'>카테고리: {row['Category']} &nbsp;·&nbsp; 용량: {int(row['Volume (ml)'])} ml</div>",
-                        unsafe_allow_html=True
-                    )
-
-                    st.markdown("<div class='nut-grid'>", unsafe_allow_html=True)
-                    r1c1, r1c2 = st.columns(2)
-                    with r1c1: st.markdown(f"<div class='pill'><span class='k'>칼로리:</span> <span class='v'>{int(row['Calories (kcal)'])}</span> <span class='u'>kcal</span></div>", unsafe_allow_html=True)
-                    with r1c2: st.markdown(f"<div class='pill'><span class='k'>카페인:</span> <span class='v'>{int(row['Caffeine (mg)'])}</span> <span class='u'>mg</span></div>", unsafe_allow_html=True)
-                    r2c1, r2c2 = st.columns(2)
-                    with r2c1: st.markdown(f"<div class='pill'><span class='k'>당:</span> <span class='v'>{int(row['Sugar (g)'])}</span> <span class='u'>g</span></div>", unsafe_allow_html=True)
-                    with r2c2: st.markdown(f"<div class='pill'><span class='k'>나트륨:</span> <span class='v'>{int(row['Sodium (mg)'])}</span> <span class='u'>mg</span></div>", unsafe_allow_html=True)
-                    r3c1, r3c2 = st.columns(2)
-                    with r3c1: st.markdown(f"<div class='pill'><span class='k'>지방:</span> <span class='v'>{int(row['Fat (g)'])}</span> <span class='u'>g</span></div>", unsafe_allow_html=True)
-                    with r3c2: st.markdown(f"<div class='pill'><span class='k'>용량:</span> <span class='v'>{int(row['Volume (ml)'])}</span> <span class='u'>ml</span></div>", unsafe_allow_html=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
-
-                    price_col, btn_col = st.columns([1, 0.6])
-                    with price_col:
-                        st.markdown(f"<div class='price mt-8'>{int(row['Price (KRW)']):,} 원</div>", unsafe_allow_html=True)
                     with btn_col:
                         if st.button("자세히 보기", key=f"detail_{item_id}"):
-                            st.session_state.detail_row = row
+                            st.session_state.user.detail = item_id
 
     # 페이지 입력
     right_spacer, right_ctrl = st.columns([5, 1])
     with right_ctrl:
         st.number_input("페이지", min_value=1, max_value=pages, value=st.session_state.page_num, step=1, key="page_num")
 
-    if st.session_state.detail_row is not None:
-        open_detail(st.session_state.detail_row)
+    detail_pos = catalog.positions_of([st.session_state.user.detail])
+    if len(detail_pos):
+        open_detail(df.iloc[int(detail_pos[0])])
+
+    schedule_prefetch(catalog, backend, spec, favorites, start, total, page_df)
+
+    if st.query_params.get("debug"):
+        render_perf_panel()
 
 # =========================
 # 라우팅
 # =========================
-if st.session_state.page == "cover":
-    render_cover()
-else:
-    render_main()
+get_perf_output()
+with timings.run():
+    if st.session_state.page == "cover":
+        render_cover()
+    else:
+        render_main()
 
 
 
@@ -0,0 +1,211 @@
+# backends.py
+"""
+질의 백엔드: QuerySpec → (결과 수, 보이는 페이지 행).
+
+- PandasBackend: 메모리 카탈로그 인덱스(FilterEngine/SearchIndex) + 공유 QueryCache — 기본값, 지금 동작 그대로
+- DuckDBBackend: ingest 스냅샷의 Parquet 을 DuckDB 로 직접 질의 (범위/IN 조건, ORDER BY, LIMIT/OFFSET)
+  → 카탈로그가 커져도 파이썬으로는 보이는 페이지 행만 가져옴
+  검색어는 기존 SearchIndex 로 후보(행 번호, 관련도 순위)를 만들어 조인 (n-gram/초성 매칭 규칙을 한 곳에 유지)
+  파레토 모드는 조건에 맞는 행의 (행 번호, 축 컬럼)만 가져와 pareto.py 로 순위를 매긴 뒤 페이지 행만 다시 조회
+- 파레토 모드의 page() 결과에는 지배 순위 열(pareto.RANK_COL)이 붙음
+- 두 백엔드의 결과(순서 포함)는 같아야 함: tests/test_backends.py 가 공용 조합 묶음으로 비교
+
+    python -m pytest tests/test_backends.py
+
+duckdb 는 선택 의존성 — 없거나 스냅샷이 카탈로그와 버전이 다르면 make_backend 가 pandas 로 대체.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog import ID_COL, read_manifest
+from filters import _LRU
+from pareto import RANK_COL, pareto_order
+from query import QueryCache, QuerySpec, execute, pareto_ranks
+
+try:
+    import duckdb
+except ImportError:   # 선택 의존성
+    duckdb = None
+
+_ROW = "file_row_number"   # DuckDB read_parquet 가 붙여 주는 행 번호 = 카탈로그 행 위치
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, catalog, cache: QueryCache = None):
+        self.catalog = catalog
+        self.cache = cache if cache is not None else QueryCache()
+
+    def positions(self, spec: QuerySpec, favorites=None) -> np.ndarray:
+        if spec.pareto:
+            return self._pareto(spec, favorites)[0]
+        return self.cache.get_or_compute(
+            self.catalog.version, spec, lambda: execute(self.catalog, spec, favorites)
+        )
+
+    def ranks(self, spec: QuerySpec, favorites=None) -> np.ndarray:
+        """파레토 모드: positions() 순서의 지배 순위 (결과와 같은 캐시에 보관)"""
+        return self._pareto(spec, favorites)[1]
+
+    def _pareto(self, spec: QuerySpec, favorites=None):
+        """위치와 순위를 지배 순위 계산 한 번으로 — spec / ("rank", spec) 두 키에 같이 넣음"""
+        computed = {}
+
+        def compute():
+            positions, computed["rank"] = execute(self.catalog, spec, favorites, with_ranks=True)
+            return positions
+
+        positions = self.cache.get_or_compute(self.catalog.version, spec, compute)
+        ranks = self.cache.get_or_compute(
+            self.catalog.version, ("rank", spec),
+            lambda: computed["rank"] if "rank" in computed else pareto_ranks(self.catalog, spec, positions),
+        )
+        return positions, ranks
+
+    def count(self, spec: QuerySpec, favorites=None) -> int:
+        return len(self.positions(spec, favorites))
+
+    def page(self, spec: QuerySpec, favorites=None, offset: int = 0, limit: int = None) -> pd.DataFrame:
+        positions = self.positions(spec, favorites)
+        stop = None if limit is None else offset + limit
+        out = self.catalog.df.iloc[positions[offset:stop]]
+        if spec.pareto:
+            out = out.assign(**{RANK_COL: self.ranks(spec, favorites)[offset:stop]})
+        return out
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    """SQL 문자열 리터럴 (CREATE VIEW 는 바인딩 파라미터를 못 받으므로 따옴표를 이스케이프)"""
+    return "'" + text.replace("'", "''") + "'"
+
+
+class DuckDBBackend:
+    """
+    스냅샷 Parquet 위의 DuckDB 질의. 연결 하나를 세션들이 공유하고 질의마다 cursor 를 씀(스레드 안전).
+    정렬 동점은 행 번호 순 — PandasBackend 의 안정 정렬과 같은 순서.
+    """
+    name = "duckdb"
+
+    def __init__(self, catalog, parquet_path: Path):
+        if duckdb is None:
+            raise ImportError("duckdb is not installed")
+        self.catalog = catalog
+        self.parquet_path = Path(parquet_path)
+        self._con = duckdb.connect()
+        self._con.execute(
+            f"CREATE VIEW catalog AS SELECT * FROM read_parquet({_literal(self.parquet_path.as_posix())}, file_row_number=true)"
+        )
+        self._columns = [c for c in self._con.execute("SELECT * FROM catalog LIMIT 0").df().columns if c != _ROW]
+        self._counts = _LRU(maxsize=1024)   # spec → 결과 수 (페이지 넘길 때 COUNT 재실행 안 함)
+        self._pareto = _LRU(maxsize=64)     # spec → (행 번호, 지배 순위) 파레토 순서
+
+    # ----- SQL 조립 -----
+    def _where(self, spec: QuerySpec, favorites):
+        conds, params = [], []
+        for col, lo, hi in spec.ranges:
+            conds.append(f"{_quote(col)} BETWEEN ? AND ?")
+            params += [lo, hi]
+        for col, values in (("Cafe", spec.cafes), ("Category", spec.categories)):
+            if values is not None:
+                conds.append(f"{_quote(col)} IN (SELECT unnest(?::VARCHAR[]))")
+                params.append(list(values))
+        if spec.temp is not None:
+            conds.append('"Temperature" = ?')
+            params.append(spec.temp)
+        if spec.favorites is not None:
+            conds.append(f"{_quote(ID_COL)} IN (SELECT unnest(?::INTEGER[]))")
+            params.append([int(i) for i in np.asarray(favorites if favorites is not None else [], dtype=np.int64)])
+        return conds, params
+
+    def _from(self, cur, spec: QuerySpec):
+        """검색어가 있으면 SearchIndex 후보를 hits(행 번호, 관련도 순위) 로 등록해 조인"""
+        if not spec.q:
+            return "catalog", None
+        hits = np.asarray(self.catalog.search.search(spec.q), dtype=np.int64)
+        cur.register("hits", pd.DataFrame({"pos": hits, "rel": np.arange(len(hits), dtype=np.int64)}))
+        return f"catalog JOIN hits ON catalog.{_ROW} = hits.pos", "rel"
+
+    def _order(self, spec: QuerySpec, rel) -> str:
+        keys = [f"{_quote(col)} {'ASC' if asc else 'DESC'}" for col, asc in spec.sort_keys]
+        if not keys and rel:
+            return f"ORDER BY {rel}"
+        return "ORDER BY " + ", ".join(keys + [_ROW])
+
+    def _select(self, spec: QuerySpec, favorites, what: str, tail: str = "", ordered: bool = False):
+        cur = self._con.cursor()
+        try:
+            source, rel = self._from(cur, spec)
+            conds, params = self._where(spec, favorites)
+            where = ("WHERE " + " AND ".join(conds)) if conds else ""
+            order = self._order(spec, rel) if ordered else ""
+            return cur.execute(f"SELECT {what} FROM {source} {where} {order} {tail}", params).df()
+        finally:
+            cur.close()
+
+    def _pareto_order(self, spec: QuerySpec, favorites):
+        def build():
+            axes = ", ".join(f"catalog.{_quote(c)}" for c in spec.pareto)
+            rows = self._select(spec, favorites, f"catalog.{_ROW}, {axes}", "ORDER BY 1")
+            order, ranks = pareto_order(rows[list(spec.pareto)].to_numpy())
+            return np.stack([rows[_ROW].to_numpy()[order], ranks])
+        return self._pareto.get_or_build(spec, build)
+
+    def _pareto_page(self, spec: QuerySpec, favorites, offset: int, limit: int) -> pd.DataFrame:
+        rows, ranks = self._pareto_order(spec, favorites)
+        stop = None if limit is None else offset + limit
+        rows, ranks = rows[offset:stop], ranks[offset:stop]
+        cols = ", ".join(_quote(c) for c in self._columns)
+        cur = self._con.cursor()
+        try:
+            out = cur.execute(
+                f"SELECT {cols}, {_ROW} FROM catalog WHERE {_ROW} IN (SELECT unnest(?::BIGINT[]))",
+                [rows.tolist()],
+            ).df()
+        finally:
+            cur.close()
+        out = out.set_index(_ROW).loc[rows]   # 지배 순위 순서로
+        out.index = out.index.to_numpy()
+        out.index.name = None
+        out[RANK_COL] = ranks
+        return out
+
+    # ----- 인터페이스 -----
+    def count(self, spec: QuerySpec, favorites=None) -> int:
+        if spec.pareto:
+            return self._pareto_order(spec, favorites).shape[1]
+        return self._counts.get_or_build(
+            spec, lambda: int(self._select(spec, favorites, "COUNT(*) AS n").iloc[0, 0])
+        )
+
+    def page(self, spec: QuerySpec, favorites=None, offset: int = 0, limit: int = None) -> pd.DataFrame:
+        if spec.pareto:
+            return self._pareto_page(spec, favorites, offset, limit)
+        cols = ", ".join(f"catalog.{_quote(c)}" for c in self._columns)
+        tail = f"OFFSET {int(offset)}" if limit is None else f"LIMIT {int(limit)} OFFSET {int(offset)}"
+        out = self._select(spec, favorites, f"{cols}, catalog.{_ROW}", tail, ordered=True)
+        out.index = out.pop(_ROW).to_numpy()   # 인덱스 = 카탈로그 행 위치 (pandas 백엔드와 같게)
+        return out
+
+    def stats(self) -> dict:
+        return {"parquet": self.parquet_path.name, "cached_counts": len(self._counts._data)}
+
+
+def make_backend(name: str, catalog, manifest_path: Path = None, cache: QueryCache = None):
+    """
+    name: "pandas" | "duckdb". duckdb 를 쓸 수 없으면(미설치/스냅샷 없음/버전 불일치) pandas 로 대체
+    """
+    if name == "duckdb" and duckdb is not None and manifest_path is not None and Path(manifest_path).exists():
+        manifest = read_manifest(manifest_path)
+        if manifest.get("version") == catalog.version:
+            return DuckDBBackend(catalog, Path(manifest_path).parent / manifest["parquet"])
+    return PandasBackend(catalog, cache)
@@ -0,0 +1,95 @@
+# bench/coldstart.py
+"""
+워커 콜드 스타트 시간과 워커당 메모리: CSV 파싱 vs Arrow 스냅샷(memory-map).
+
+    python -m bench.coldstart [--rows N] [--workers K]
+
+- 합성 카탈로그(N 행)를 임시 폴더에 만들고 ingest 로 스냅샷 생성
+- 모드마다 워커 프로세스 K 개를 동시에 띄워 카탈로그를 로딩 + 대표 질의(검색/정렬)를 한 번씩 돌린 뒤
+  (memory-map 한 색인은 실제로 읽힌 페이지만 메모리에 올라오므로 서비스 중인 워커처럼 건드려 둠),
+  모두 살아 있는 상태에서 /proc/<pid>/smaps_rollup 의 Rss/Pss 를 읽음 (Pss 는 공유 페이지를 프로세스 수로 나눈 값)
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench.synthetic import make_synthetic_catalog
+from ingest import ingest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from catalog import load_catalog, load_snapshot
+cat = load_snapshot({path!r}) if {mode!r} == "snapshot" else load_catalog({path!r})
+load_ms = (time.perf_counter() - t0) * 1e3
+t0 = time.perf_counter()
+for q in ("라떼", "아", "ㄹ", "ice", "스타벅스 라떼", "ㅇㅁㄹㅋㄴ"):
+    cat.search.search(q)
+for col in cat.filters.order:
+    cat.filters.sort_positions(cat.filters.order[col], ((col, False),))
+    cat.filters.range_mask(col, 0, cat.bounds.get(col, 0) // 2)
+print(json.dumps({{"load_ms": load_ms, "warm_ms": (time.perf_counter() - t0) * 1e3, "rows": len(cat.df)}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def _smaps_kb(pid: int) -> dict:
+    out = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, val = line.split(":", 1)
+        out[key] = int(val.split()[0])
+    return out
+
+
+def run_mode(mode: str, path: Path, workers: int) -> dict:
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _CHILD.format(root=str(ROOT), path=str(path), mode=mode)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        loads = [json.loads(p.stdout.readline()) for p in procs]
+        mem = [_smaps_kb(p.pid) for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+    n = len(procs)
+    return {
+        "mode": mode,
+        "load_ms": sum(d["load_ms"] for d in loads) / n,
+        "warm_ms": sum(d["warm_ms"] for d in loads) / n,
+        "rss_mb": sum(m["Rss"] for m in mem) / n / 1024,
+        "pss_mb": sum(m["Pss"] for m in mem) / n / 1024,
+        "shared_mb": sum(m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0) for m in mem) / n / 1024,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_path = tmp / "catalog.csv"
+        make_synthetic_catalog(args.rows).to_csv(csv_path, index=False)
+        ingest(csv_path, tmp / "snapshots")   # item_ids.json 도 여기서 만들어 두므로 워커는 쓰지 않음
+
+        print(f"rows: {args.rows:,}  workers: {args.workers}")
+        print(f"{'mode':<9} {'load ms':>9} {'warm ms':>9} {'RSS MB':>8} {'PSS MB':>8} {'shared MB':>10}")
+        for mode, path in [("csv", csv_path), ("snapshot", tmp / "snapshots" / "current.json")]:
+            r = run_mode(mode, path, args.workers)
+            print(f"{r['mode']:<9} {r['load_ms']:9.0f} {r['warm_ms']:9.0f} {r['rss_mb']:8.1f} {r['pss_mb']:8.1f} "
+                  f"{r['shared_mb']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# bench/filters.py
+"""
+필터 지연시간 측정: 기존 pandas 체인 vs FilterEngine (합성 카탈로그, 기본 1M 행).
+
+    python -m bench.filters [N_ROWS]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bench.synthetic import make_synthetic_catalog
+from catalog import prepare_frame
+from filters import RANGE_COLS, FilterEngine
+
+
+def _timeit(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def _pandas_chain(df, ranges):
+    # render_main() 의 기존 방식: df.copy() + 컬럼별 .between() 체인
+    f = df.copy()
+    m = None
+    for col, (lo, hi) in ranges.items():
+        c = f[col].between(lo, hi)
+        m = c if m is None else (m & c)
+    return f[m]
+
+
+def main(n_rows: int = 1_000_000):
+    df = prepare_frame(make_synthetic_catalog(n_rows))
+    t0 = time.perf_counter()
+    engine = FilterEngine(df)
+    build_ms = (time.perf_counter() - t0) * 1e3
+
+    bounds = {col: int(df[col].max()) for col in RANGE_COLS}
+    ranges = {col: (0, bounds[col]) for col in RANGE_COLS}
+    ranges["Calories (kcal)"] = (0, 300)
+    ranges["Sugar (g)"] = (0, 30)
+
+    run = lambda: engine.positions(ranges)
+    first_ms = _timeit(run, repeat=1)   # 방금 만든 엔진: 모든 마스크 새로 계산
+    warm_ms = _timeit(run)
+    pandas_ms = _timeit(lambda: _pandas_chain(df, ranges))
+
+    # 슬라이더 하나만 이동: 칼로리 상한만 바꾸고 나머지 마스크는 캐시 적중
+    moves = iter(range(301, 10_000))
+    def one_slider():
+        r = dict(ranges)
+        r["Calories (kcal)"] = (0, next(moves))
+        engine.positions(r)
+    one_ms = _timeit(one_slider)
+
+    assert np.array_equal(
+        engine.positions(ranges),
+        np.flatnonzero(df.index.isin(_pandas_chain(df, ranges).index)),
+    )
+    print(f"rows: {n_rows:,}  engine build: {build_ms:.1f} ms")
+    print(f"pandas copy+between chain : {pandas_ms:8.2f} ms")
+    print(f"engine, all masks cold    : {first_ms:8.2f} ms")
+    print(f"engine, all masks cached  : {warm_ms:8.2f} ms")
+    print(f"engine, one slider moved  : {one_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
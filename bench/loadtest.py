@@ -0,0 +1,371 @@
+# bench/loadtest.py
+"""
+동시 세션 부하 시험: 로컬에 앱 서버를 띄우고 웹소켓(스트림릿 프로토콜)으로 브라우저 세션 N 개를 흉내.
+
+    python -m bench.loadtest [--sessions 1,10,50,100,200] [--duration 30] [--think 1.0] [--rows N] [--out FILE]
+    python -m bench.loadtest --url ws://host:8501 --pid SERVER_PID ...   # 이미 떠 있는 서버에 붙기
+
+- 서버: python -m streamlit run app.py (헤드리스, 빈 포트). --rows 를 주면 bench.suite 의 합성 데이터 폴더 사용
+- 세션: /_stcore/stream 에 접속해 BackMsg(rerun_script) 를 보내고 ForwardMsg 를 script_finished 까지 받음
+  · 받은 델타에서 위젯 id 를 모아 두고(키 → id), 값 위젯 상태는 브라우저처럼 계속 보내고 버튼은 한 번만 보냄
+  · ?u= 토큰(page_info_changed)과 캐시된 메시지 해시를 기억해 다음 rerun 에 같이 보냄
+  · 표지→메인 후 검색/프리셋/페이지 넘김/상세 열기·닫기/즐겨찾기/슬라이더를 가중치대로 고르고,
+    동작 사이에 평균 --think 초(지수 분포)를 쉼
+- 세션 수 단계마다: 램프업 이후 구간의 rerun 지연 p50/p99, 처리량(rerun/s), 오류 수,
+  서버 CPU(코어 대비 %)와 RSS 최대(세션당 증가분 포함) — /proc 에서 읽으므로 리눅스 전용
+- 처리량이 세션 수를 늘려도 10% 넘게 늘지 않거나 CPU 가 한 코어의 90% 를 넘는 첫 단계를 포화로 표시
+  (부하 생성기도 같은 머신에서 돌면 CPU 를 나눠 쓰므로 포화 지점이 실제보다 낮게 보일 수 있음)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+DEFAULT_SESSIONS = (1, 10, 50, 100, 200)
+RERUN_TIMEOUT = 120.0    # 초
+SEARCH_TERMS = ["라떼", "아메리카노", "티", "스무디", "콜드브루", "바닐라", ""]
+PRESETS = ["preset_lowcal", "preset_lowsugar", "preset_lowcaf"]
+# 동작 → 가중치
+ACTIONS = {"search": 0.25, "paginate": 0.30, "detail": 0.25, "preset": 0.10, "favorite": 0.05, "slider": 0.05}
+FINISHED = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+# =========================
+# 세션 하나 (브라우저 흉내)
+# =========================
+class Session:
+    def __init__(self, ws):
+        self.ws = ws
+        self.query_string = ""
+        self.widgets = {}    # 위젯 id → (요소 종류, proto) — 마지막 rerun 에서 그려진 것
+        self.values = {}     # 위젯 id → WidgetState — 사용자가 바꾼 값 위젯 (매 rerun 에 다시 보냄)
+        self.cached = {}     # 캐시 가능한 메시지 해시 → (요소 종류, proto)
+
+    def find(self, key: str = None, label: str = None, prefix: str = None):
+        for wid, (kind, proto) in self.widgets.items():
+            if key is not None and wid.endswith(f"-{key}"):
+                return wid
+            if prefix is not None and wid.rsplit("-", 1)[-1].startswith(prefix):
+                return wid
+            if label is not None and getattr(proto, "label", None) == label:
+                return wid
+        return None
+
+    def find_all(self, prefix: str) -> list:
+        return [wid for wid in self.widgets if wid.rsplit("-", 1)[-1].startswith(prefix)]
+
+    def _element(self, kind, proto):
+        if getattr(proto, "id", ""):
+            self.widgets[proto.id] = (kind, proto)
+
+    async def rerun(self, trigger: str = None, **states) -> float:
+        """states: 위젯 id → WidgetState. script_finished(정상)까지 걸린 시간(ms)"""
+        self.values.update(states)
+        msg = BackMsg()
+        cs = msg.rerun_script
+        cs.query_string = self.query_string
+        cs.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            cs.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        cs.cached_message_hashes.extend(self.cached)
+
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT))
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.widgets = {}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                el = fwd.delta.new_element
+                name = el.WhichOneof("type")
+                proto = getattr(el, name)
+                self._element(name, proto)
+                if fwd.metadata.cacheable:
+                    self.cached[fwd.hash] = (name, proto)
+            elif kind == "ref_hash":
+                if fwd.ref_hash in self.cached:
+                    self._element(*self.cached[fwd.ref_hash])
+            elif kind == "page_info_changed":
+                self.query_string = fwd.page_info_changed.query_string
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("script compile error")
+                if fwd.script_finished in FINISHED:
+                    return (time.perf_counter() - t0) * 1e3
+                # FINISHED_EARLY_FOR_RERUN: st.rerun() → 이어지는 실행까지 기다림
+        # (도달하지 않음)
+
+
+# =========================
+# 사용자 동작
+# =========================
+async def do_search(s, rng):
+    wid = s.find(key="search_q")
+    return await s.rerun(**{wid: WidgetState(id=wid, string_value=str(rng.choice(SEARCH_TERMS)))})
+
+
+async def do_preset(s, rng):
+    return await s.rerun(trigger=s.find(key=str(rng.choice(PRESETS))))
+
+
+async def do_paginate(s, rng):
+    wid = s.find(key="page_num")
+    if wid is None:
+        return await s.rerun()
+    proto = s.widgets[wid][1]
+    cur = s.values[wid].double_value if wid in s.values else (proto.default or 1)
+    nxt = cur + 1 if cur < proto.max else 1
+    return await s.rerun(**{wid: WidgetState(id=wid, double_value=nxt)})
+
+
+async def do_detail(s, rng):
+    ids = s.find_all("detail_")
+    if not ids:
+        return await s.rerun()
+    ms = await s.rerun(trigger=str(rng.choice(ids)))
+    close = s.find(label="확인")   # 모달 닫기 (on_click 콜백)
+    if close is not None:
+        await asyncio.sleep(rng.exponential(0.5))
+        ms = [ms, await s.rerun(trigger=close)]
+    return ms
+
+
+async def do_favorite(s, rng):
+    ids = s.find_all("favstar_")
+    return await s.rerun(trigger=str(rng.choice(ids))) if ids else await s.rerun()
+
+
+async def do_slider(s, rng):
+    sliders = [wid for wid, (kind, _) in s.widgets.items() if kind == "slider"]
+    wid = str(rng.choice(sliders))
+    proto = s.widgets[wid][1]
+    hi = proto.min + (proto.max - proto.min) * rng.uniform(0.3, 1.0)
+    return await s.rerun(**{wid: WidgetState(id=wid, double_array_value={"data": [proto.min, hi]})})
+
+
+ACTION_FUNCS = {
+    "search": do_search, "paginate": do_paginate, "detail": do_detail,
+    "preset": do_preset, "favorite": do_favorite, "slider": do_slider,
+}
+
+
+async def user(url: str, seed: int, start_at: float, end_at: float, think: float, samples: list, errors: list):
+    """세션 하나: start_at 에 접속, end_at 까지 동작 반복. samples 에 (끝난 시각, ms, 동작) 추가"""
+    rng = np.random.default_rng(seed)
+    names = list(ACTIONS)
+    probs = np.array(list(ACTIONS.values()))
+    probs /= probs.sum()
+    await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+    try:
+        async with websockets.connect(f"{url}/_stcore/stream", subprotocols=["streamlit"],
+                                      max_size=None, open_timeout=RERUN_TIMEOUT) as ws:
+            s = Session(ws)
+            samples.append((time.perf_counter(), await s.rerun(), "cover"))
+            samples.append((time.perf_counter(), await s.rerun(trigger=s.find(key="start_btn")), "start"))
+            samples.append((time.perf_counter(), await s.rerun(), "main"))
+            while time.perf_counter() < end_at:
+                await asyncio.sleep(rng.exponential(think))
+                if time.perf_counter() >= end_at:
+                    break
+                name = names[rng.choice(len(names), p=probs)]
+                ms = await ACTION_FUNCS[name](s, rng)
+                for m in (ms if isinstance(ms, list) else [ms]):
+                    samples.append((time.perf_counter(), m, name))
+    except Exception as e:   # 시간 초과/연결 끊김도 결과로 집계
+        errors.append(f"{type(e).__name__}: {e}")
+
+
+# =========================
+# 서버 (시작 / 자원 사용량)
+# =========================
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, data_dir: str = None) -> subprocess.Popen:
+    env = dict(os.environ)
+    if data_dir:
+        env["SMARTCUP_DATA_DIR"] = data_dir
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(APP),
+         "--server.headless=true", f"--server.port={port}", "--server.address=127.0.0.1",
+         "--browser.gatherUsageStats=false", "--server.fileWatcherType=none", "--logger.level=error"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.3)
+    proc.kill()
+    raise RuntimeError("server did not become healthy in 60 s")
+
+
+def cpu_seconds(pid: int):
+    """프로세스 누적 CPU 시간(초, user+system) — /proc 이 없으면 None"""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rss_mb(pid: int):
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# =========================
+# 단계 실행 / 보고
+# =========================
+async def run_level(url: str, pid, n: int, duration: float, ramp: float, think: float, seed: int, rss_base) -> dict:
+    """rss_base: 준비(warm-up) 직후 서버 RSS — 세션당 메모리는 (단계 최대 RSS - rss_base) / n"""
+    samples, errors = [], []
+    t0 = time.perf_counter()
+    end_at = t0 + ramp + duration
+    tasks = [
+        asyncio.create_task(user(url, seed * 100_003 + i, t0 + ramp * i / n, end_at, think, samples, errors))
+        for i in range(n)
+    ]
+    await asyncio.sleep(ramp)
+    cpu0, w0 = (cpu_seconds(pid) if pid else None), time.perf_counter()
+    rss_peak = rss_base
+    while time.perf_counter() < end_at:
+        await asyncio.sleep(0.5)
+        r = rss_mb(pid) if pid else None
+        if r is not None:
+            rss_peak = max(rss_peak or 0, r)
+    cpu1, w1 = (cpu_seconds(pid) if pid else None), time.perf_counter()
+    await asyncio.gather(*tasks)   # 진행 중이던 rerun 은 끝까지 (창 밖이므로 집계 제외)
+
+    window = np.array([ms for t, ms, _ in samples if w0 <= t <= w1])
+    out = {
+        "sessions": n,
+        "reruns": int(len(window)),
+        "throughput_rps": round(len(window) / (w1 - w0), 2),
+        "p50_ms": round(float(np.percentile(window, 50)), 1) if len(window) else None,
+        "p99_ms": round(float(np.percentile(window, 99)), 1) if len(window) else None,
+        "errors": len(errors),
+        "cpu_pct": round((cpu1 - cpu0) / (w1 - w0) * 100, 1) if cpu0 is not None and cpu1 is not None else None,
+        "rss_mb": round(rss_peak, 1) if rss_peak is not None else None,
+    }
+    if rss_peak is not None and rss_base is not None:
+        out["rss_kb_per_session"] = round((rss_peak - rss_base) * 1024 / n, 1)
+    if errors:
+        out["first_error"] = errors[0]
+    return out
+
+
+def saturation(levels: list):
+    """처리량 증가가 10% 미만이거나 CPU 90% 이상인 첫 단계의 세션 수"""
+    for prev, cur in zip(levels, levels[1:]):
+        if (cur["cpu_pct"] or 0) >= 90 or cur["throughput_rps"] < prev["throughput_rps"] * 1.1:
+            return cur["sessions"]
+    return None
+
+
+async def main_async(args, url: str, pid, levels: list):
+    """levels 에 단계 결과를 끝나는 대로 추가 (중간에 실패해도 끝난 단계는 남음)"""
+    # 준비: 세션 하나로 카탈로그/인덱스를 데움 (콜드 로딩은 단계 결과에서 제외)
+    warm_samples, warm_errors = [], []
+    now = time.perf_counter()
+    await user(url, 0, now, now + 3 * args.think, args.think, warm_samples, warm_errors)
+    if warm_errors:
+        raise RuntimeError(f"warm-up failed: {warm_errors[0]}")
+    rss_base = rss_mb(pid) if pid else None
+
+    print(f"{'sessions':>8}{'reruns':>8}{'rps':>8}{'p50 ms':>9}{'p99 ms':>9}{'err':>5}{'cpu %':>7}{'rss MB':>8}{'KB/sess':>9}")
+    for n in args.sessions:
+        r = await run_level(url, pid, n, args.duration, args.ramp, args.think, args.seed, rss_base)
+        levels.append(r)
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['throughput_rps']:>8}{r['p50_ms'] or 0:>9}{r['p99_ms'] or 0:>9}"
+              f"{r['errors']:>5}{r['cpu_pct'] or 0:>7}{r['rss_mb'] or 0:>8}{r.get('rss_kb_per_session', 0):>9}")
+
+
+def stop_server(proc: subprocess.Popen, timeout: float = 30):
+    """SIGTERM 후 timeout 초 안에 안 끝나면 SIGKILL (멈춘 서버가 고아로 남지 않게)"""
+    proc.terminate()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"server did not exit {timeout:.0f} s after SIGTERM; killing", file=sys.stderr)
+        proc.kill()
+        proc.wait()
+
+
+def write_report(args, levels: list):
+    sat = saturation(levels)
+    print(f"\nsaturation: ~{sat} sessions" if sat else "\nsaturation: not reached")
+    if args.out:
+        report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpus": os.cpu_count(),
+                  "rows": args.rows, "think_s": args.think, "duration_s": args.duration,
+                  "complete": len(levels) == len(args.sessions),
+                  "levels": levels, "saturation_sessions": sat}
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", default=",".join(map(str, DEFAULT_SESSIONS)))
+    ap.add_argument("--duration", type=float, default=30.0, help="단계당 측정 시간(초, 램프업 제외)")
+    ap.add_argument("--ramp", type=float, default=5.0, help="세션 접속을 고르게 나누는 시간(초)")
+    ap.add_argument("--think", type=float, default=1.0, help="동작 사이 평균 대기(초)")
+    ap.add_argument("--rows", type=int, help="합성 카탈로그 행 수 (없으면 실제 CSV)")
+    ap.add_argument("--url", help="이미 떠 있는 서버 (예: ws://127.0.0.1:8501)")
+    ap.add_argument("--pid", type=int, help="--url 서버의 PID (CPU/RSS 측정용)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    args = ap.parse_args()
+    args.sessions = [int(s) for s in args.sessions.split(",") if s]
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        if args.url:
+            url, pid = args.url.rstrip("/"), args.pid
+        else:
+            data_dir = None
+            if args.rows:
+                from bench.suite import make_data_dir
+                data_dir = str(make_data_dir(Path(tmp), args.rows))
+            port = free_port()
+            proc = start_server(port, data_dir)
+            url, pid = f"ws://127.0.0.1:{port}", proc.pid
+        levels = []
+        try:
+            asyncio.run(main_async(args, url, pid, levels))
+        finally:
+            write_report(args, levels)   # 서버를 내리기 전에 — 멈춘 단계까지 기록
+            if proc is not None:
+                stop_server(proc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# bench/render.py
+"""
+메인 화면 rerun 1회당 렌더링 시간과 델타(요소/블록) 메시지 수 측정 (브라우저 없이 AppTest).
+
+    python -m bench.render [REPEAT]
+"""
+import logging
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+
+def count_deltas(node) -> int:
+    """요소 트리의 노드 수 = 스크립트가 보낸 델타 수 (루트 제외)"""
+    children = getattr(node, "children", None) or {}
+    return sum(1 + count_deltas(c) for c in children.values())
+
+
+def main(repeat: int = 20):
+    logging.disable(logging.CRITICAL)
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    at.button(key="start_btn").click().run()
+    at.run()
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - t0) * 1e3)
+    times.sort()
+
+    main_deltas = count_deltas(at.main)
+    total = count_deltas(at._tree)
+    print(f"deltas per rerun: main={main_deltas} total={total}")
+    print(f"rerun ms: p50={times[len(times) // 2]:.1f} min={times[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
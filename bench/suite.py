@@ -0,0 +1,176 @@
+# bench/suite.py
+"""
+헤드리스 벤치마크 묶음: 합성 카탈로그 + 더미 이미지 폴더를 만들고 AppTest 로 사용자 동작을 재생해 단계별 시간 기록.
+
+    python -m bench.suite [--sizes 1000,100000,1000000] [--repeat 5] [--think 0] [--out bench/baseline.json]
+    python -m bench.suite --sizes 1000,100000 --compare bench/baseline.json [--tolerance 1.5]
+
+- 크기마다 임시 폴더에 smartcup_final_6.csv(합성) + images/(일부 행의 더미 JPEG, 하드링크)를 만들고
+  SMARTCUP_DATA_DIR 로 app.py 가 그 폴더를 쓰게 함 (상태 DB/성능 로그도 그 안에 생김)
+- 동작: 표지→메인, 프리셋, 슬라이더, 검색, 정렬 변경, 페이지 넘김, 즐겨찾기, 상세 열기
+- --think: 동작 전 대기(초) — 사용자가 화면을 보는 동안 도는 백그라운드 프리페치(prefetch.py) 효과 측정용
+- 반복마다 새 AppTest(새 세션)로 같은 순서를 재생. 첫 반복은 카탈로그 로딩이 포함된 cold,
+  나머지는 공유 캐시가 데워진 상태 → 동작별 cold/p50/max (ms) + perf.timings 단계별 p50
+- --out: 결과를 JSON 기준선으로 저장, --compare: 기준선 대비 p50 가 tolerance 배 넘게(그리고 5ms 넘게) 느려진
+  동작을 출력하고 종료 코드 1
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+from bench.synthetic import make_synthetic_catalog
+from images import safe_filename
+from perf import timings
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+MAX_IMAGES = 2_000          # 더미 이미지 수 상한 (나머지 행은 "이미지 없음" 경로)
+MIN_REGRESSION_MS = 5.0     # 이보다 작은 차이는 잡음으로 보고 무시
+
+
+def make_data_dir(root: Path, n_rows: int, seed: int = 0) -> Path:
+    """root 에 합성 CSV + images/ (앞쪽 정렬에 잘 나오는 행을 포함해 최대 MAX_IMAGES 장)"""
+    df = make_synthetic_catalog(n_rows, seed=seed)
+    df.to_csv(root / "smartcup_final_6.csv", index=False)
+
+    img_dir = root / "images"
+    img_dir.mkdir()
+    proto = img_dir / ".proto.jpg"
+    Image.new("RGB", (640, 640), (200, 170, 140)).save(proto, quality=85)
+    rng = np.random.default_rng(seed)
+    picks = set(rng.choice(n_rows, size=min(n_rows, MAX_IMAGES), replace=False).tolist())
+    picks |= set(df.nsmallest(min(n_rows, 60), "Calories (kcal)").index)   # 기본 정렬 첫 페이지들
+    for i in sorted(picks):
+        row = df.iloc[i]
+        dst = img_dir / f"{safe_filename(row['Cafe'])}_{safe_filename(row['Name'])}.jpg"
+        if not dst.exists():
+            os.link(proto, dst)
+    proto.unlink()
+    return root
+
+
+def _timed(results: dict, step: str, action, think: float = 0.0):
+    if think:
+        time.sleep(think)   # 사용자가 화면을 보는 시간 (시간 측정에서 제외)
+    t0 = time.perf_counter()
+    at = action()
+    results.setdefault(step, []).append((time.perf_counter() - t0) * 1e3)
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception}")
+    return at
+
+
+def run_scenario(results: dict, think: float = 0.0):
+    """새 세션 하나로 동작 순서를 재생하며 동작별 시간(ms)을 results 에 추가"""
+    at = AppTest.from_file(str(APP), default_timeout=600)
+    _timed(results, "cover", at.run)
+    _timed(results, "cover_to_main", lambda: at.button(key="start_btn").click().run(), think)
+    _timed(results, "main_rerun", at.run)
+    _timed(results, "preset", lambda: at.button(key="preset_lowsugar").click().run(), think)
+    slider = next(s for s in at.slider if s.label == "칼로리 (kcal)")
+    _timed(results, "slider", lambda: slider.set_range(0, max(1, int(slider.max) // 2)).run(), think)
+    _timed(results, "search", lambda: at.text_input(key="search_q").input("라떼").run(), think)
+    _timed(results, "sort", lambda: at.selectbox(key="sort_key").select("가격 낮은 순").run(), think)
+    _timed(results, "page", lambda: at.number_input(key="page_num").set_value(2).run(), think)
+    fav = next(b for b in at.button if b.key and b.key.startswith("favstar_"))
+    _timed(results, "favorite", lambda: fav.click().run(), think)
+    detail = next(b for b in at.button if b.key and b.key.startswith("detail_"))
+    _timed(results, "detail", lambda: detail.click().run(), think)
+
+
+def bench_size(n_rows: int, repeat: int, think: float = 0.0) -> dict:
+    import streamlit as st
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        make_data_dir(Path(tmp), n_rows)
+        setup_s = time.perf_counter() - t0
+        os.environ["SMARTCUP_DATA_DIR"] = tmp
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        timings.reset()
+        results = {}
+        try:
+            for _ in range(repeat):
+                run_scenario(results, think)
+        finally:
+            st.cache_resource.clear()   # 상태 DB 연결/카탈로그를 놓아서 임시 폴더를 지울 수 있게
+            os.environ.pop("SMARTCUP_DATA_DIR", None)
+
+    steps = {}
+    for step, ms in results.items():
+        warm = sorted(ms[1:]) or ms
+        steps[step] = {
+            "cold_ms": round(ms[0], 2),
+            "p50_ms": round(float(np.median(warm)), 2),
+            "max_ms": round(max(warm), 2),
+        }
+    stages = {name: round(s["p50"], 3) for name, s in timings.summary().items()}
+    return {"rows": n_rows, "repeat": repeat, "think_s": think, "setup_s": round(setup_s, 2), "steps": steps, "stage_p50_ms": stages}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """(크기, 동작, 기준 p50, 현재 p50) — 기준보다 tolerance 배 넘게 느려진 것"""
+    out = []
+    for size, cur in current["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for step, s in cur["steps"].items():
+            b = base["steps"].get(step)
+            if b and s["p50_ms"] > b["p50_ms"] * tolerance and s["p50_ms"] - b["p50_ms"] > MIN_REGRESSION_MS:
+                out.append((size, step, b["p50_ms"], s["p50_ms"]))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--think", type=float, default=0.0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--compare", type=Path)
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    args = ap.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    import streamlit
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "streamlit": streamlit.__version__,
+                    "platform": platform.platform(), "cpus": os.cpu_count()},
+        "sizes": {},
+    }
+    for n in (int(s) for s in args.sizes.split(",") if s):
+        r = bench_size(n, args.repeat, args.think)
+        report["sizes"][str(n)] = r
+        print(f"\n== {n:,} rows (setup {r['setup_s']} s)")
+        print(f"{'step':<15}{'cold ms':>10}{'p50 ms':>10}{'max ms':>10}")
+        for step, s in r["steps"].items():
+            print(f"{step:<15}{s['cold_ms']:>10.1f}{s['p50_ms']:>10.1f}{s['max_ms']:>10.1f}")
+
+    if args.out:
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nbaseline written: {args.out}")
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        for size, step, b, c in regressions:
+            print(f"REGRESSION {size} rows / {step}: {b:.1f} ms -> {c:.1f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"\nno regressions vs {args.compare} (tolerance x{args.tolerance})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# cards.py
+"""
+카드/성분칩 HTML 생성.
+
+- 카드 하나의 본문(썸네일/제목/메타/성분칩/가격)을 HTML 한 덩어리로 만들어 st.markdown 한 번에 전송
+  (이전: 카드마다 st.markdown/st.columns 약 15회 → rerun 마다 델타 메시지 수십~수백 개)
+- 즐겨찾기/자세히 보기 버튼만 스트림릿 위젯으로 남김
+- 스타일 클래스(card-title/meta/nut-grid/pill/price/spark)는 app.py 전역 스타일 그대로 사용
+- 사이드바 슬라이더 아래 히스토그램(sparkline)도 같은 방식: 막대 div 묶음 하나를 markdown 한 번에
+"""
+import html
+
+# (라벨, 컬럼, 단위) — 카드는 2열×3행 순서
+CARD_PILLS = [
+    ("칼로리", "Calories (kcal)", "kcal"),
+    ("카페인", "Caffeine (mg)", "mg"),
+    ("당", "Sugar (g)", "g"),
+    ("나트륨", "Sodium (mg)", "mg"),
+    ("지방", "Fat (g)", "g"),
+    ("용량", "Volume (ml)", "ml"),
+]
+DETAIL_PILLS = [
+    ("칼로리", "Calories (kcal)", "kcal"),
+    ("당", "Sugar (g)", "g"),
+    ("카페인", "Caffeine (mg)", "mg"),
+    ("나트륨", "Sodium (mg)", "mg"),
+    ("지방", "Fat (g)", "g"),
+    ("용량", "Volume (ml)", "ml"),
+]
+# "더 가벼운 음료" 차이 표기 (similar.HEALTH_COLS 순서)
+HEALTH_PILLS = [
+    ("당", "Sugar (g)", "g"),
+    ("칼로리", "Calories (kcal)", "kcal"),
+    ("카페인", "Caffeine (mg)", "mg"),
+]
+
+
+def nut_grid_html(row, pills=CARD_PILLS) -> str:
+    chips = "".join(
+        f"<div class='pill'><span class='k'>{label}:</span> <span class='v'>{int(row[col])}</span> "
+        f"<span class='u'>{unit}</span></div>"
+        for label, col, unit in pills
+    )
+    return f"<div class='nut-grid'>{chips}</div>"
+
+
+def pareto_badge(rank: int) -> str:
+    """파레토 모드 지배 순위(0 = 최적) → 카드 배지 문구"""
+    return "🏆 파레토 최적" if rank == 0 else f"파레토 {rank + 1}단계"
+
+
+def card_html(title: str, row, thumb_uri: str = None, badge: str = None) -> str:
+    """카드 본문 HTML (버튼 제외)"""
+    esc = html.escape
+    thumb = f"<img class='card-thumb' src='{thumb_uri}' alt=''/>" if thumb_uri else ""
+    badge = f"<div class='meta'>{esc(badge)}</div>" if badge else ""
+    return (
+        f"<div class='sc-card'>{thumb}{badge}"
+        f"<div class='card-title'>{esc(title)}</div>"
+        f"<div class='meta mt-8'>카테고리: {esc(str(row['Category']))} &nbsp;·&nbsp; "
+        f"용량: {int(row['Volume (ml)'])} ml</div>"
+        f"{nut_grid_html(row, CARD_PILLS)}"
+        f"<div class='price mt-8'>{int(row['Price (KRW)']):,} 원</div>"
+        f"</div>"
+    )
+
+
+def sparkline_html(hist, edges, lo, hi, n_in: int, n_all: int) -> str:
+    """구간별 개수 → 막대 스파크라인 (현재 슬라이더 범위와 겹치는 구간은 강조) + 범위 안 개수"""
+    top = max(int(max(hist, default=0)), 1)
+    bars = "".join(
+        f"<i class='{'on' if edges[b] <= hi and edges[b + 1] >= lo else ''}' "
+        f"style='height:{max(int(n) * 100 // top, 4 if n else 0)}%'></i>"
+        for b, n in enumerate(hist)
+    )
+    return f"<div class='spark'>{bars}</div><div class='spark-cap'>범위 안 {n_in:,}개 / {n_all:,}개</div>"
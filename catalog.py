@@ -0,0 +1,275 @@
+# catalog.py
+"""
+카탈로그(smartcup_final_6.csv) 로딩/정규화.
+
+- 앱(app.py)은 st.cache_resource 로 감싸서 세션 간 공유(읽기 전용)로 사용
+- 원본 CSV 또는 ingest.py 가 만든 Arrow 스냅샷(memory-map)에서 로딩 (스냅샷은 검색/필터 색인 배열도 함께 map)
+- 스트림릿 없이도 import 가능하도록 이 모듈은 pandas 만 의존 (스냅샷 로딩 때만 pyarrow)
+"""
+import hashlib
+import io
+import json
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from perf import timings
+
+# =========================
+# 컬럼 정의
+# =========================
+NUM_COLS = [
+    "Volume (ml)",
+    "Calories (kcal)",
+    "Caffeine (mg)",
+    "Sugar (g)",
+    "Fat (g)",
+    "Sodium (mg)",
+    "Price (KRW)",
+]
+CAT_COLS = ["Cafe", "Category", "Temperature"]
+SEARCH_COLS = ["Name", "Cafe", "Category"]   # 검색 대상 (각각 {col}__norm 생성)
+ID_COL = "item_id"   # 정수 음료 ID (item_ids.json 으로 CSV 갱신 후에도 유지)
+
+
+def norm_key(s: str) -> str:
+    """검색/파일명 비교용: 한글 포함 공백/언더스코어/하이픈 제거 + 소문자 + 유니코드 정규화"""
+    s = unicodedata.normalize("NFKC", str(s or ""))
+    s = s.lower().strip()
+    return s.replace(" ", "").replace("_", "").replace("-", "")
+
+
+def file_signature(path: Path) -> tuple:
+    """캐시 무효화 키: (mtime_ns, size). 파일이 없으면 (0, 0)"""
+    try:
+        st_ = Path(path).stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+# =========================
+# 카탈로그
+# =========================
+@dataclass
+class Catalog:
+    df: pd.DataFrame                    # 압축 dtype + {col}__norm 검색키 포함
+    version: str                        # 원본 내용 해시 (sha1 앞 12자리)
+    bounds: dict = field(default_factory=dict)   # 슬라이더 상한: {컬럼: int(max)}
+    cafes: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+    temps: list = field(default_factory=list)
+    search: object = None               # search.SearchIndex (n-gram/초성 역색인)
+    filters: object = None              # filters.FilterEngine (정렬 인덱스 + 조건별 마스크)
+    similar: object = None              # similar.SimilarIndex (표준화 특징 행렬 + KD-tree)
+    id_to_pos: np.ndarray = None        # item_id → 행 위치 (없는 id 는 -1)
+
+    def positions_of(self, ids) -> np.ndarray:
+        """item_id 배열 → 행 위치 (카탈로그에서 사라진 id 는 제외, 입력 순서 유지)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < len(self.id_to_pos))]
+        pos = self.id_to_pos[ids]
+        return pos[pos >= 0]
+
+
+def _compact_numeric(s: pd.Series) -> pd.Series:
+    """정수값만 있으면 가장 작은 int, 아니면 float32"""
+    s = pd.to_numeric(s, errors="coerce").fillna(0)
+    if (s % 1 == 0).all():
+        return pd.to_numeric(s.astype("int64"), downcast="integer")
+    return s.astype("float32")
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """원본 프레임 → 압축 dtype + 정규화 검색키"""
+    df = df.copy()
+    for col in NUM_COLS:
+        df[col] = _compact_numeric(df[col])
+    for col in SEARCH_COLS:
+        df[f"{col}__norm"] = df[col].astype(str).map(norm_key)
+    # 검색키 생성 후 카테고리형으로 (문자열 비교/isin 은 그대로 동작)
+    for col in CAT_COLS:
+        df[col] = df[col].astype(str).str.strip().astype("category")
+    return df
+
+
+# =========================
+# 정수 음료 ID
+# =========================
+def item_key(cafe, temp, name) -> str:
+    """ID 매핑용 식별 문자열: 같은 카페/이름이라도 온도가 다르면 다른 음료"""
+    return f"{str(cafe).strip()}||{str(temp).strip()}||{str(name).strip()}"
+
+
+def assign_item_ids(df: pd.DataFrame, ids_path: Path) -> np.ndarray:
+    """
+    행마다 정수 ID 부여. 기존 매핑(ids_path)은 그대로 재사용하고 새 음료만 뒤에 번호를 붙여 저장.
+    (같은 식별 문자열이 여러 번 나오면 #2, #3 ... 을 붙여 구분)
+    """
+    ids_path = Path(ids_path)
+    try:
+        saved = json.loads(ids_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        saved = {}
+    mapping = dict(saved.get("ids", {}))
+    next_id = int(saved.get("next_id", max(mapping.values(), default=-1) + 1))
+
+    out = np.empty(len(df), dtype=np.int32)
+    seen = {}
+    changed = False
+    for i, (cafe, temp, name) in enumerate(zip(df["Cafe"], df["Temperature"], df["Name"])):
+        key = item_key(cafe, temp, name)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        if key not in mapping:
+            mapping[key] = next_id
+            next_id += 1
+            changed = True
+        out[i] = mapping[key]
+
+    if changed:
+        try:
+            tmp = ids_path.with_name(f"{ids_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"next_id": next_id, "ids": mapping}, ensure_ascii=False, indent=0),
+                           encoding="utf-8")
+            os.replace(tmp, ids_path)
+        except OSError:
+            pass   # 읽기 전용 배포 환경: 이번 프로세스에서만 사용
+    return out
+
+
+def build_catalog(df: pd.DataFrame, version: str, arrays: dict = None) -> Catalog:
+    """
+    준비된 프레임(prepare_frame + item_id) → 슬라이더 상한/옵션/검색·필터 인덱스까지 계산.
+    arrays: 스냅샷에 저장해 둔 검색/필터 색인 배열 (있으면 다시 만들지 않음, 유사도 KD-tree 는 항상 새로)
+    """
+    from filters import FilterEngine
+    from search import SearchIndex   # search → catalog(norm_key) 순환 import 회피
+    from similar import SimilarIndex
+
+    ids = df[ID_COL].to_numpy()
+    id_to_pos = np.full(int(ids.max(initial=-1)) + 1, -1, dtype=np.int32)
+    id_to_pos[ids] = np.arange(len(ids), dtype=np.int32)
+
+    with timings.stage("index_search"):
+        search = SearchIndex(df, arrays)
+    with timings.stage("index_filters"):
+        filters = FilterEngine(df, arrays=arrays)
+    with timings.stage("index_similar"):
+        similar = SimilarIndex(df)
+
+    return Catalog(
+        df=df,
+        version=version,
+        bounds={col: int(df[col].max()) for col in NUM_COLS},
+        cafes=sorted(df["Cafe"].cat.categories),
+        categories=sorted(df["Category"].cat.categories),
+        temps=sorted(df["Temperature"].cat.categories),
+        search=search,
+        filters=filters,
+        similar=similar,
+        id_to_pos=id_to_pos,
+    )
+
+
+def load_catalog(path: Path, ids_path: Path = None) -> Catalog:
+    """CSV 한 번 파싱 → 압축/정규화/슬라이더 상한/정수 ID 까지 미리 계산"""
+    path = Path(path)
+    with timings.stage("catalog_csv_read"):
+        raw = path.read_bytes()
+        version = hashlib.sha1(raw).hexdigest()[:12]
+        df = pd.read_csv(io.BytesIO(raw))
+    with timings.stage("catalog_normalize"):
+        df = prepare_frame(df)
+        df[ID_COL] = assign_item_ids(df, ids_path or path.with_name("item_ids.json"))
+    return build_catalog(df, version)
+
+
+# =========================
+# 컬럼형 스냅샷 (ingest.py 가 생성)
+# =========================
+SNAPSHOT_FORMAT = 1
+INDEX_FORMAT = 1   # 색인 배열 파일의 이름/배치 (search/filters 의 arrays() 가 바뀌면 올림 → 예전 파일은 무시)
+_INDEX_ALIGN = 64  # 배열마다 시작 위치를 맞춰 두면 numpy 가 정렬된 채로 바로 가리킴
+
+
+def read_manifest(manifest_path: Path) -> dict:
+    return json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+
+
+def index_arrays(catalog: Catalog) -> dict:
+    """스냅샷에 함께 저장하는 파생 색인: 검색 n-gram CSR 포스팅/필드 코드 + 필터 정렬 순열/구간 번호"""
+    return {**catalog.search.arrays(), **catalog.filters.arrays()}
+
+
+def write_index_file(path: Path, arrays: dict):
+    """이름 → 배열을 비압축 Arrow IPC 한 파일로 (배열 하나 = large_binary 값 하나 + dtype/shape)"""
+    import pyarrow as pa
+
+    names, dtypes, shapes, blobs = [], [], [], []
+    for name, a in arrays.items():
+        raw = np.ascontiguousarray(a).tobytes()
+        names.append(name)
+        dtypes.append(a.dtype.str)
+        shapes.append(list(a.shape))
+        blobs.append(raw + bytes(-len(raw) % _INDEX_ALIGN))
+    table = pa.table({
+        "name": pa.array(names, pa.string()),
+        "dtype": pa.array(dtypes, pa.string()),
+        "shape": pa.array(shapes, pa.list_(pa.int64())),
+        "data": pa.array(blobs, pa.large_binary()),
+    })
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_index_file(path: Path) -> dict:
+    """write_index_file 결과를 memory-map → 이름 → 읽기 전용 배열 (복사 없이 파일 페이지를 그대로 가리킴)"""
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all().combine_chunks()
+    data = table.column("data").chunk(0)
+    # 스칼라 as_buffer() 는 복사본이므로 값 버퍼(파일 페이지)를 오프셋으로 직접 잘라 씀
+    _, offsets, values = data.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[data.offset:]
+    out = {}
+    for i, (name, dtype, shape) in enumerate(zip(table.column("name").to_pylist(),
+                                                 table.column("dtype").to_pylist(),
+                                                 table.column("shape").to_pylist())):
+        dtype, count = np.dtype(dtype), int(np.prod(shape))
+        if count:
+            out[name] = np.frombuffer(values, dtype=dtype, count=count, offset=int(offsets[i])).reshape(shape)
+        else:
+            out[name] = np.empty(shape, dtype=dtype)
+    return out
+
+
+def load_snapshot(manifest_path: Path) -> Catalog:
+    """
+    스냅샷(Arrow IPC, 비압축)을 memory-map 해서 로딩.
+    - 숫자/문자열 컬럼과 파생 색인(검색 포스팅/필드 코드, 필터 정렬 순열/구간 번호 — 워커 메모리의 대부분)은
+      파일 페이지를 그대로 가리키므로(zero-copy) 여러 워커 프로세스가 OS 페이지 캐시를 공유
+    - 워커마다 따로 드는 것: 카테고리 코드, 문자 → 코드 dict, 유사도 특징 행렬 + KD-tree, 질의 캐시
+    - CSV 파싱/타입 추론/정규화/ID 부여/색인 구성은 ingest 때 이미 끝남
+      (색인 파일이 없거나 INDEX_FORMAT 이 다르면 예전처럼 로딩 때 색인을 만듦)
+    """
+    import pyarrow as pa   # streamlit 의존성으로 항상 설치됨; CSV 경로만 쓸 땐 import 안 함
+
+    manifest_path = Path(manifest_path)
+    manifest = read_manifest(manifest_path)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"unsupported snapshot format: {manifest.get('format')}")
+    with timings.stage("catalog_snapshot_map"):
+        source = pa.memory_map(str(manifest_path.parent / manifest["arrow"]), "r")
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas(split_blocks=True)
+    arrays = None
+    if manifest.get("index") and manifest.get("index_format") == INDEX_FORMAT:
+        with timings.stage("catalog_index_map"):
+            arrays = read_index_file(manifest_path.parent / manifest["index"])
+    return build_catalog(df, manifest["version"], arrays)
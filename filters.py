@@ -0,0 +1,220 @@
+# filters.py
+"""
+필터 엔진: 정렬 인덱스 + searchsorted 로 범위 조건을 풀고, 조건별 마스크를 캐시해서 AND.
+
+- 숫자 컬럼마다 안정 정렬 순열(argsort)과 정렬된 값을 로딩 시 한 번 계산
+- 범위 [lo, hi] → searchsorted 두 번 → 순열 구간만 True 인 불리언 마스크
+- 조건(컬럼, lo, hi) 단위로 마스크 캐시 → 슬라이더 하나만 움직이면 그 마스크만 새로 계산
+- 결과는 행 위치(np.ndarray); 프레임 복사 없음
+- 정렬도 로딩 시 계산한 안정 정렬 순열을 재사용 (다중 키/내림차순은 처음 쓸 때 한 번 계산)
+- 패싯 개수: 조건 마스크(캐시) AND 후 카테고리 코드 bincount — groupby 없음
+- 슬라이더 히스토그램: 로딩 시 숫자 컬럼마다 고정 구간(HIST_BINS) 번호를 계산해 두고 같은 방식으로 bincount
+- 카탈로그와 함께 세션 간 공유되므로 캐시는 스레드 안전
+- 정렬 순열/정렬된 값/구간 번호는 arrays() 로 스냅샷에 저장해 두고 memory-map 으로 복원 가능
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 사이드바 슬라이더 대상 (원본 .between() 과 같은 양끝 포함 범위)
+RANGE_COLS = [
+    "Calories (kcal)",
+    "Caffeine (mg)",
+    "Sugar (g)",
+    "Fat (g)",
+    "Sodium (mg)",
+    "Price (KRW)",
+]
+HIST_BINS = 30   # 슬라이더 아래 히스토그램 구간 수 (0 ~ 컬럼 최댓값 등분)
+
+
+class _LRU:
+    """키 → 배열 (LRU, 스레드 안전). 캐시된 배열은 읽기 전용"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = build()   # 락 밖에서 계산 (동시에 같은 키를 만들어도 결과는 같음)
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+
+class FilterEngine:
+    def __init__(self, df: pd.DataFrame, range_cols=RANGE_COLS, cat_cols=("Cafe", "Category", "Temperature"),
+                 arrays: dict = None):
+        """arrays: 저장해 둔 arrays() 결과 (있으면 정렬/구간 계산 없이 그대로 씀)"""
+        self.n_rows = len(df)
+        self.values = {}
+        self.order = {}
+        self.sorted_vals = {}
+        self.bin_edges = {}
+        self.bins = {}
+        for col in range_cols:
+            vals = df[col].to_numpy()
+            self.values[col] = vals
+            if arrays is not None:
+                for name in ("order", "sorted_vals", "bin_edges", "bins"):
+                    getattr(self, name)[col] = arrays[f"filters.{col}.{name}"]
+                continue
+            order = np.argsort(vals, kind="stable").astype(np.int32)
+            self.order[col] = order
+            self.sorted_vals[col] = vals[order]
+            # 구간 번호 (결측은 HIST_BINS = 버리는 칸)
+            edges = np.linspace(0, max(float(np.nanmax(vals, initial=0)), 1.0), HIST_BINS + 1)
+            b = np.searchsorted(edges[1:-1], vals, side="right").astype(np.uint8)
+            b[np.isnan(vals)] = HIST_BINS
+            self.bin_edges[col] = edges
+            self.bins[col] = b
+        # 카테고리형 컬럼은 코드 배열 + {값: 코드}
+        self.codes = {}
+        self.code_of = {}
+        for col in cat_cols:
+            cat = df[col].astype("category")
+            self.codes[col] = cat.cat.codes.to_numpy()
+            self.code_of[col] = {v: i for i, v in enumerate(cat.cat.categories)}
+        self._cache = _LRU()
+        self._sorts = _LRU(maxsize=32)
+        for col in range_cols:   # 단일 컬럼 오름차순 = 범위 인덱스 순열 그대로
+            self._sorts.get_or_build(((col, True),), lambda col=col: self.order[col])
+
+    def arrays(self) -> dict:
+        """정렬 순열/정렬된 값/구간 경계/구간 번호를 이름 → 배열로 (스냅샷 저장용)"""
+        return {f"filters.{col}.{name}": getattr(self, name)[col]
+                for col in self.order for name in ("order", "sorted_vals", "bin_edges", "bins")}
+
+    # ----- 조건별 마스크 (None = 제약 없음) -----
+    def range_mask(self, col: str, lo, hi):
+        return self._cache.get_or_build(("range", col, lo, hi), lambda: self._build_range(col, lo, hi))
+
+    def _build_range(self, col, lo, hi):
+        sv = self.sorted_vals[col]
+        a = int(np.searchsorted(sv, lo, side="left"))
+        b = int(np.searchsorted(sv, hi, side="right"))
+        if a == 0 and b == self.n_rows:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.order[col][a:b]] = True
+        return mask
+
+    def isin_mask(self, col: str, values):
+        """빈 선택/전체 선택은 제약 없음(None) — 원본 `if selected:` 동작과 동일"""
+        if values is None:
+            return None
+        key = ("isin", col, tuple(sorted(map(str, values))))
+        return self._cache.get_or_build(key, lambda: self._build_isin(col, values))
+
+    def _build_isin(self, col, values):
+        code_of = self.code_of[col]
+        codes = sorted({code_of[v] for v in values if v in code_of})
+        if not values or len(codes) == len(code_of):
+            return None
+        lut = np.zeros(len(code_of) + 1, dtype=bool)   # 코드 -1(결측) 은 마지막 칸
+        lut[codes] = True
+        return lut[self.codes[col]]
+
+    # ----- 조합 -----
+    def mask(self, ranges: dict, cats: dict = None):
+        """
+        ranges: {컬럼: (lo, hi)}, cats: {컬럼: 선택값 목록 또는 None}
+        → 모든 조건 AND 한 새 마스크 (조건이 하나도 없으면 None)
+        """
+        parts = [self.range_mask(col, lo, hi) for col, (lo, hi) in ranges.items()]
+        parts += [self.isin_mask(col, vals) for col, vals in (cats or {}).items()]
+        parts = [m for m in parts if m is not None]
+        if not parts:
+            return None
+        out = parts[0].copy()
+        for m in parts[1:]:
+            np.logical_and(out, m, out=out)
+        return out
+
+    def positions(self, ranges: dict, cats: dict = None, within=None) -> np.ndarray:
+        """
+        조건을 만족하는 행 위치.
+        within: 후보 행 위치(예: 검색 결과, 관련도 순) — 주면 그 순서를 유지한 채 거름
+        """
+        mask = self.mask(ranges, cats)
+        if within is not None:
+            within = np.asarray(within)
+            return within if mask is None else within[mask[within]]
+        if mask is None:
+            return np.arange(self.n_rows, dtype=np.int32)
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def _select(self, codes: np.ndarray, ranges: dict, cats: dict = None, within=None) -> np.ndarray:
+        mask = self.mask(ranges, cats)
+        if within is not None:
+            within = np.asarray(within)
+            return codes[within if mask is None else within[mask[within]]]
+        return codes if mask is None else codes[mask]
+
+    def value_counts(self, col: str, ranges: dict, cats: dict = None, within=None) -> np.ndarray:
+        """조건을 만족하는 행의 col 값별 개수 (code_of[col] 코드 순, 결측 제외)"""
+        codes = self._select(self.codes[col], ranges, cats, within)
+        return np.bincount(codes[codes >= 0], minlength=len(self.code_of[col]))
+
+    def histogram(self, col: str, ranges: dict, cats: dict = None, within=None) -> np.ndarray:
+        """조건을 만족하는 행의 col 구간별 개수 (길이 HIST_BINS, 구간 경계는 bin_edges[col])"""
+        bins = self._select(self.bins[col], ranges, cats, within)
+        return np.bincount(bins, minlength=HIST_BINS + 1)[:HIST_BINS]
+
+    # ----- 정렬 -----
+    def sort_perm(self, keys) -> np.ndarray:
+        """
+        keys: ((컬럼, 오름차순 여부), ...) — 앞쪽이 우선
+        → 전체 행의 안정 정렬 순열 (키마다 한 번만 계산 후 공유)
+        """
+        keys = tuple((col, bool(asc)) for col, asc in keys)
+        return self._sorts.get_or_build(keys, lambda: self._build_perm(keys))
+
+    def _build_perm(self, keys):
+        # lexsort 는 마지막 키가 1순위, 안정 정렬. 내림차순은 값의 순위를 뒤집어서
+        cols = []
+        for col, asc in reversed(keys):
+            rank = np.empty(self.n_rows, dtype=np.int64)
+            # 동점은 같은 순위여야 안정성이 유지됨 → 정렬값이 바뀌는 지점 기준 누적
+            sv = self.sorted_vals[col]
+            dense = np.concatenate(([0], np.cumsum(sv[1:] != sv[:-1])))
+            rank[self.order[col]] = dense
+            cols.append(rank if asc else -rank)
+        return np.lexsort(cols).astype(np.int32)
+
+    def _rank(self, keys) -> np.ndarray:
+        """정렬 순열의 역순열: 행 위치 → 정렬 순위"""
+        def build():
+            perm = self.sort_perm(keys)
+            rank = np.empty(self.n_rows, dtype=np.int32)
+            rank[perm] = np.arange(self.n_rows, dtype=np.int32)
+            return rank
+        return self._sorts.get_or_build(("rank",) + tuple(keys), build)
+
+    def sort_positions(self, positions: np.ndarray, keys) -> np.ndarray:
+        """
+        행 위치 집합을 keys 순서로 정렬.
+        - 많이 남았으면: 전체 순열을 마스크로 걸러냄 (O(n), 정렬 없음)
+        - 조금 남았으면: 역순열로 순위만 모아 argsort (O(k log k))
+        """
+        keys = tuple((col, bool(asc)) for col, asc in keys)
+        positions = np.asarray(positions)
+        if len(positions) * 16 < self.n_rows:
+            rank = self._rank(keys)
+            return positions[np.argsort(rank[positions], kind="stable")]
+        perm = self.sort_perm(keys)
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[positions] = True
+        return perm[mask[perm]]
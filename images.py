@@ -0,0 +1,230 @@
+# images.py
+"""
+images/ 폴더 인덱스: 정규화된 파일 스템 → 경로.
+
+- 파일명 규칙: {카페명}_{음료명}.jpg 또는 {카페명}_{온도} {음료명}.jpg
+- 앱은 폴더 mtime 을 키로 캐시 (파일 추가/삭제/이름변경 시 폴더 mtime 이 바뀜)
+- 카드/상세용 축소본(썸네일/중간 크기)은 cache_dir(앱은 데이터 폴더의 .cache/images/)에 디스크 캐시
+  (파일명 = 원본 경로+규격 키 _ mtime, 원본이 바뀌어 새로 만들면 같은 키의 예전 mtime 파일은 지움)
+- CLI: python images.py report   → 이미지가 없는 음료 목록 출력
+       python images.py prewarm  → 모든 원본의 축소본을 프로세스 풀로 미리 생성
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image, ImageOps, features
+
+from catalog import norm_key
+from perf import timings
+
+ALLOW_EXT = {".jpg", ".jpeg", ".png"}   # 비교는 소문자 기준 (.JPG 등 허용)
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "images"   # 기본값 (앱은 DATA_DIR 기준 경로를 넘김)
+# 축소본 규격: 이름 → 최대 (가로, 세로). 비율 유지
+SIZES = {
+    "thumb":  (320, 320),   # 카드
+    "detail": (900, 900),   # 상세 모달
+}
+# WebP 인코더가 없는 Pillow 빌드면 JPEG 로 대체
+DERIV_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+DERIV_EXT = ".webp" if DERIV_FORMAT == "WEBP" else ".jpg"
+
+
+def safe_filename(text: str) -> str:
+    return str(text).replace(" ", "_").replace("/", "-").replace("\\", "-").strip()
+
+
+def dir_signature(img_dir: Path) -> int:
+    """캐시 무효화 키: 폴더 mtime_ns (폴더가 없으면 0)"""
+    try:
+        return Path(img_dir).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def build_image_index(img_dir: Path) -> dict:
+    """폴더를 한 번만 순회해서 {norm_key(stem): Path} 생성 (같은 키는 이름순 첫 파일 우선)"""
+    img_dir = Path(img_dir)
+    index = {}
+    if not img_dir.is_dir():
+        return index
+    for p in sorted(img_dir.iterdir()):
+        if p.suffix.lower() not in ALLOW_EXT or not p.is_file():
+            continue
+        index.setdefault(norm_key(p.stem), p)
+    return index
+
+
+def candidate_keys(cafe: str, name: str, temp: str = "") -> list:
+    """
+    조회 후보 키 (우선순위 순):
+    1) 원문 스템: Cafe_Name, Cafe_Temp Name
+    2) safe_filename 버전: Cafe_Name, Cafe_Temp_Name
+    """
+    cafe_raw = str(cafe or "").strip()
+    name_raw = str(name or "").strip()
+    temp_raw = str(temp or "").strip()
+
+    stems = [f"{cafe_raw}_{name_raw}"]
+    if temp_raw:
+        stems.append(f"{cafe_raw}_{temp_raw} {name_raw}")
+
+    cafe_s, name_s = safe_filename(cafe_raw), safe_filename(name_raw)
+    stems.append(f"{cafe_s}_{name_s}")
+    if temp_raw:
+        stems.append(f"{cafe_s}_{safe_filename(temp_raw)}_{name_s}")
+
+    keys = []
+    for stem in stems:
+        k = norm_key(stem)
+        if k not in keys:
+            keys.append(k)
+    return keys
+
+
+def lookup(index: dict, cafe: str, name: str, temp: str = ""):
+    """후보 키를 순서대로 dict 조회 (O(1)); 없으면 None"""
+    for k in candidate_keys(cafe, name, temp):
+        p = index.get(k)
+        if p is not None:
+            return p
+    return None
+
+
+def resolve_all(df: pd.DataFrame, index: dict) -> pd.Series:
+    """카탈로그 전체 행 → 이미지 경로(없으면 None), df 와 같은 인덱스"""
+    paths = [
+        lookup(index, cafe, name, temp)
+        for cafe, name, temp in zip(df["Cafe"], df["Name"], df["Temperature"])
+    ]
+    return pd.Series(paths, index=df.index, dtype=object)
+
+
+def missing_images(df: pd.DataFrame, index: dict) -> pd.DataFrame:
+    """이미지가 없는 음료 행만 반환"""
+    return df.loc[resolve_all(df, index).isna(), ["Cafe", "Temperature", "Name"]]
+
+
+# =========================
+# 축소본(썸네일/상세) 디스크 캐시
+# =========================
+def derivative_path(src: Path, size: str, cache_dir: Path = CACHE_DIR) -> Path:
+    """캐시 파일 경로: {sha1(원본 절대경로 + 규격)}_{mtime}"""
+    src = Path(src)
+    mtime = src.stat().st_mtime_ns
+    w, h = SIZES[size]
+    key = hashlib.sha1(f"{src.resolve()}|{w}x{h}".encode("utf-8")).hexdigest()[:20]
+    return Path(cache_dir) / size / f"{key}_{mtime}{DERIV_EXT}"
+
+
+def _remove_stale(dst: Path):
+    """같은 원본/규격의 예전 mtime 축소본 삭제 (원본을 바꿀 때마다 캐시가 쌓이지 않게)"""
+    key = dst.stem.rsplit("_", 1)[0]
+    for old in dst.parent.glob(f"{key}_*{DERIV_EXT}"):
+        if old != dst:
+            try:
+                old.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+def _render_derivative(src: Path, dst: Path, size: str) -> Path:
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail(SIZES[size], Image.LANCZOS)
+        if im.mode not in ("RGB", "RGBA") or (DERIV_FORMAT == "JPEG" and im.mode == "RGBA"):
+            im = im.convert("RGB")
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f"{dst.stem}.{os.getpid()}.{threading.get_ident()}.tmp")   # 프리페치 스레드와 겹쳐도 따로
+        if DERIV_FORMAT == "WEBP":
+            im.save(tmp, DERIV_FORMAT, quality=80, method=4)
+        else:
+            im.save(tmp, DERIV_FORMAT, quality=82, optimize=True)
+        os.replace(tmp, dst)   # 동시 생성돼도 반쯤 쓴 파일이 보이지 않게
+    _remove_stale(dst)
+    return dst
+
+
+def get_derivative(src: Path, size: str = "thumb", cache_dir: Path = CACHE_DIR):
+    """
+    축소본 경로 반환 (없으면 그 자리에서 생성 = lazy).
+    원본이 깨졌거나 읽을 수 없으면 원본 경로를 그대로 반환.
+    """
+    try:
+        dst = derivative_path(src, size, cache_dir)
+        if dst.exists():
+            return dst
+        with timings.stage("image_resize"):
+            return _render_derivative(Path(src), dst, size)
+    except (OSError, ValueError):
+        return Path(src)
+
+
+@lru_cache(maxsize=512)
+def _data_uri_cached(path: str) -> str:
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"data:{mime};base64," + base64.b64encode(Path(path).read_bytes()).decode("ascii")
+
+
+def data_uri(src: Path, size: str = "thumb", cache_dir: Path = CACHE_DIR):
+    """
+    축소본을 HTML 에 바로 넣을 data URI 로 (축소본 경로에 mtime 이 들어 있어 캐시 키로 안전).
+    축소본을 못 만들면(깨진/읽을 수 없는 원본) None — 원본 전체를 base64 로 넣지 않음
+    """
+    path = get_derivative(src, size, cache_dir)
+    if path == Path(src):
+        return None
+    return _data_uri_cached(str(path))
+
+
+def _prewarm_one(args) -> int:
+    src, cache_dir = args
+    made = 0
+    for size in SIZES:
+        dst = derivative_path(src, size, cache_dir)
+        if not dst.exists():
+            try:
+                _render_derivative(src, dst, size)
+                made += 1
+            except (OSError, ValueError):
+                pass
+    return made
+
+
+def prewarm(img_dir: Path, cache_dir: Path = CACHE_DIR, workers=None) -> int:
+    """images/ 전체의 모든 규격 축소본을 프로세스 풀로 생성. 새로 만든 파일 수 반환"""
+    srcs = sorted(set(build_image_index(img_dir).values()))
+    if not srcs:
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [(p, Path(cache_dir)) for p in srcs]
+        return sum(pool.map(_prewarm_one, jobs, chunksize=16))
+
+
+if __name__ == "__main__":
+    from catalog import load_catalog
+
+    data_dir = Path(__file__).parent
+    cmd = sys.argv[1:2]
+    if cmd == ["report"]:
+        cat = load_catalog(data_dir / "smartcup_final_6.csv")
+        idx = build_image_index(data_dir / "images")
+        missing = missing_images(cat.df, idx)
+        print(f"images: {len(idx)}  drinks: {len(cat.df)}  missing: {len(missing)}")
+        for cafe, temp, name in missing.itertuples(index=False):
+            print(f"- {cafe} | {temp} | {name}")
+    elif cmd == ["prewarm"]:
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        made = prewarm(data_dir / "images", workers=workers)
+        print(f"prewarm: {made} files created in {CACHE_DIR}")
+    else:
+        print("usage: python images.py report | prewarm [workers]")
+        sys.exit(2)
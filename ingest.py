@@ -0,0 +1,144 @@
+# ingest.py
+"""
+카탈로그 수집(ingest): CSV 검증 → 정규화 → 버전별 컬럼형 스냅샷 생성.
+
+    python ingest.py [smartcup_final_6.csv] [--out snapshots]
+
+- 검증: 필수 컬럼, 숫자 파싱, 음수, 빈 이름/카페/온도 (오류가 있으면 아무것도 쓰지 않고 종료코드 1)
+- 정규화: catalog.prepare_frame (압축 dtype + __norm 검색키) + item_ids.json 정수 ID
+- 출력 (버전 = 원본 CSV sha1 앞 12자리):
+    snapshots/catalog-<버전>.arrow    앱이 memory-map 으로 여는 비압축 Arrow IPC
+    snapshots/catalog-<버전>.parquet  대용량/외부 엔진용 (압축)
+    snapshots/catalog-<버전>.index.arrow  검색/필터 파생 색인 배열 (비압축, 워커들이 memory-map 으로 공유)
+    snapshots/current.json           현재 스냅샷 매니페스트 (마지막에 원자적으로 교체)
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from catalog import (CAT_COLS, ID_COL, INDEX_FORMAT, NUM_COLS, SNAPSHOT_FORMAT, assign_item_ids, build_catalog,
+                     index_arrays, item_key, prepare_frame, write_index_file)
+
+DATA_DIR = Path(__file__).parent
+REQUIRED_COLS = ["Name"] + NUM_COLS + CAT_COLS
+
+
+def validate(raw: pd.DataFrame) -> tuple:
+    """(오류 목록, 경고 목록). 행 번호는 CSV 줄 번호(헤더 = 1)"""
+    errors, warnings = [], []
+    missing = [c for c in REQUIRED_COLS if c not in raw.columns]
+    if missing:
+        return [f"missing columns: {missing}"], warnings
+
+    def lines(mask):
+        rows = (mask[mask].index + 2).tolist()
+        return f"{rows[:10]}{' ...' if len(rows) > 10 else ''}"
+
+    for col in NUM_COLS:
+        num = pd.to_numeric(raw[col], errors="coerce")
+        bad = num.isna() & raw[col].notna()
+        if bad.any():
+            errors.append(f"{col}: not a number at lines {lines(bad)}")
+        if raw[col].isna().any():
+            warnings.append(f"{col}: empty at lines {lines(raw[col].isna())} (stored as 0)")
+        neg = num < 0
+        if neg.any():
+            errors.append(f"{col}: negative at lines {lines(neg)}")
+
+    for col in ["Name", "Cafe", "Temperature"]:
+        empty = raw[col].isna() | (raw[col].astype(str).str.strip() == "")
+        if empty.any():
+            errors.append(f"{col}: empty at lines {lines(empty)}")
+
+    keys = pd.Series([item_key(c, t, n) for c, t, n in zip(raw["Cafe"], raw["Temperature"], raw["Name"])])
+    dup = keys.duplicated()
+    if dup.any():
+        warnings.append(f"duplicate Cafe/Temperature/Name at lines {lines(dup)} (ids get #2, #3 ...)")
+    odd_temp = ~raw["Temperature"].astype(str).str.strip().isin(["HOT", "ICE"])
+    if odd_temp.any():
+        warnings.append(f"Temperature not HOT/ICE at lines {lines(odd_temp)}")
+    return errors, warnings
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def ingest(csv_path: Path, out_dir: Path, ids_path: Path = None) -> dict:
+    raw_bytes = Path(csv_path).read_bytes()
+    version = hashlib.sha1(raw_bytes).hexdigest()[:12]
+    raw = pd.read_csv(io.BytesIO(raw_bytes))
+
+    errors, warnings = validate(raw)
+    for w in warnings:
+        print(f"warning: {w}", file=sys.stderr)
+    if errors:
+        for e in errors:
+            print(f"error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    df = prepare_frame(raw)
+    df[ID_COL] = assign_item_ids(df, ids_path or Path(csv_path).with_name("item_ids.json"))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"smartcup.version": version.encode(),
+        b"smartcup.source_sha1": hashlib.sha1(raw_bytes).hexdigest().encode(),
+    })
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrow_name = f"catalog-{version}.arrow"
+    parquet_name = f"catalog-{version}.parquet"
+
+    tmp_arrow = out_dir / f"{arrow_name}.{os.getpid()}.tmp"
+    with pa.OSFile(str(tmp_arrow), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)   # 비압축: memory-map 후 zero-copy
+    os.replace(tmp_arrow, out_dir / arrow_name)
+
+    # 색인은 로딩 때와 같은 프레임(Arrow 왕복)으로 만들어야 행 위치/값이 그대로 맞음
+    index_name = f"catalog-{version}.index.arrow"
+    tmp_index = out_dir / f"{index_name}.{os.getpid()}.tmp"
+    write_index_file(tmp_index, index_arrays(build_catalog(table.to_pandas(split_blocks=True), version)))
+    os.replace(tmp_index, out_dir / index_name)
+
+    tmp_parquet = out_dir / f"{parquet_name}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_parquet, compression="zstd")
+    os.replace(tmp_parquet, out_dir / parquet_name)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "source": Path(csv_path).name,
+        "source_sha1": hashlib.sha1(raw_bytes).hexdigest(),
+        "rows": len(df),
+        "arrow": arrow_name,
+        "parquet": parquet_name,
+        "index": index_name,
+        "index_format": INDEX_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    _atomic_write_bytes(out_dir / "current.json",
+                        json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+    return manifest
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="CSV → 검증/정규화 → Arrow/Parquet 스냅샷")
+    ap.add_argument("csv", nargs="?", default=str(DATA_DIR / "smartcup_final_6.csv"))
+    ap.add_argument("--out", default=str(DATA_DIR / "snapshots"))
+    args = ap.parse_args()
+    m = ingest(Path(args.csv), Path(args.out))
+    print(f"snapshot {m['version']}: {m['rows']} rows → {Path(args.out) / m['arrow']}")
@@ -0,0 +1,132 @@
+# pareto.py
+"""
+파레토(가성비) 모드: 고른 축(칼로리/당/가격 등, 모두 낮을수록 좋음)에서의 지배 순위.
+
+- 지배: 모든 축에서 같거나 낮고 하나 이상에서 더 낮음
+- 지배 순위(층): 0 = 파레토 최적(아무에게도 지배당하지 않음), 1 = 0층을 빼면 최적, ...
+- 같은 값 조합은 한 점으로 합쳐 계산(서로 지배하지 않음 → 같은 층), 사전식 정렬 순서로 훑음
+  · 1축: 값의 dense rank
+  · 2축: 층마다 지금까지의 최소 y 가 층 번호에 대해 단조 → bisect 한 번 (O(n log n))
+  · 3축: 층마다 (y, z) 계단(staircase)을 두고 층 번호를 이분 탐색 (O(n log² n))
+  · 4축 이상: 층마다 점 배열을 두고 numpy 로 지배 여부 확인 (대체 경로)
+- 결과는 query.QueryCache 로 필터 상태(QuerySpec)마다 캐시되므로 일반 정렬처럼 재사용
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# (라벨, 컬럼) — 모두 낮을수록 좋은 축
+PARETO_AXES = [
+    ("칼로리", "Calories (kcal)"),
+    ("당", "Sugar (g)"),
+    ("가격", "Price (KRW)"),
+    ("카페인", "Caffeine (mg)"),
+    ("지방", "Fat (g)"),
+    ("나트륨", "Sodium (mg)"),
+]
+DEFAULT_AXES = ("Calories (kcal)", "Sugar (g)", "Price (KRW)")
+RANK_COL = "Dominance rank"   # 파레토 모드 결과 프레임에 붙는 열 (0 = 최적)
+
+
+def _layers_2d(pts: np.ndarray) -> np.ndarray:
+    min_y = []   # 층별 지금까지 최소 y (층 번호에 대해 비감소)
+    out = np.empty(len(pts), dtype=np.int32)
+    for i, y in enumerate(pts[:, 1].tolist()):
+        # 앞선 점(x 가 같거나 작음) 중 y 가 같거나 작은 점이 있는 층에는 못 들어감
+        layer = bisect_right(min_y, y)
+        if layer == len(min_y):
+            min_y.append(y)
+        else:
+            min_y[layer] = y
+        out[i] = layer
+    return out
+
+
+class _Staircase:
+    """(y, z) 최소점 집합: y 오름차순, z 내림차순. (y', z') <= (y, z) 인 점이 있는지 O(log n)"""
+
+    def __init__(self):
+        self.ys = []
+        self.zs = []
+
+    def dominates(self, y, z) -> bool:
+        i = bisect_right(self.ys, y) - 1   # y' <= y 중 z' 가 가장 작은 점 = 가장 오른쪽
+        return i >= 0 and self.zs[i] <= z
+
+    def add(self, y, z):
+        i = bisect_left(self.ys, y)
+        j = i
+        while j < len(self.ys) and self.zs[j] >= z:   # 새 점이 지배하는 점들은 연속 구간
+            j += 1
+        self.ys[i:j] = [y]
+        self.zs[i:j] = [z]
+
+
+def _layers_3d(pts: np.ndarray) -> np.ndarray:
+    stairs = []
+    out = np.empty(len(pts), dtype=np.int32)
+    for i, (_, y, z) in enumerate(pts.tolist()):
+        # "층 L 에 지배하는 점이 있음" 은 L 에 대해 단조 → 이분 탐색으로 첫 빈 층
+        lo, hi = 0, len(stairs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if stairs[mid].dominates(y, z):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(stairs):
+            stairs.append(_Staircase())
+        stairs[lo].add(y, z)
+        out[i] = lo
+    return out
+
+
+def _layers_nd(pts: np.ndarray) -> np.ndarray:
+    bufs, sizes = [], []   # 층별 점 버퍼(용량 2배씩 증가)와 채운 개수
+    out = np.empty(len(pts), dtype=np.int32)
+    for i, p in enumerate(pts):
+        lo, hi = 0, len(bufs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (bufs[mid][:sizes[mid]] <= p).all(axis=1).any():   # 앞선 점은 사전식으로 작으므로 <= 면 지배
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(bufs):
+            bufs.append(np.empty((4, pts.shape[1]), dtype=pts.dtype))
+            sizes.append(0)
+        elif sizes[lo] == len(bufs[lo]):
+            bufs[lo] = np.concatenate([bufs[lo], np.empty_like(bufs[lo])])
+        bufs[lo][sizes[lo]] = p
+        sizes[lo] += 1
+        out[i] = lo
+    return out
+
+
+def dominance_rank(values: np.ndarray) -> np.ndarray:
+    """values: (n, k) — 낮을수록 좋은 축 k 개 → 행마다 지배 순위(층, 0 = 파레토 최적)"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    values = np.where(np.isnan(values), np.inf, values)   # 결측은 가장 나쁜 값
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int32)
+    # 같은 값 조합을 합치고 사전식 정렬 (np.unique(axis=0) 결과는 사전식 오름차순)
+    pts, inverse = np.unique(values, axis=0, return_inverse=True)
+    k = pts.shape[1]
+    if k == 1:
+        layers = np.arange(len(pts), dtype=np.int32)
+    elif k == 2:
+        layers = _layers_2d(pts)
+    elif k == 3:
+        layers = _layers_3d(pts)
+    else:
+        layers = _layers_nd(pts)
+    return layers[inverse.reshape(-1)]
+
+
+def pareto_order(values: np.ndarray):
+    """지배 순위 오름차순(동순위는 입력 순서) 순열과 그 순서의 순위"""
+    ranks = dominance_rank(values)
+    order = np.argsort(ranks, kind="stable")
+    return order, ranks[order]
@@ -0,0 +1,156 @@
+# perf.py
+"""
+단계별 소요 시간 계측 (항상 켜져 있는 가벼운 타이머).
+
+- timings.stage("filter"): with 블록 시간을 단계별 최근 WINDOW 개 링 버퍼 + 누적 합/횟수에 기록
+  (perf_counter 두 번 + 락 한 번 — 패널을 안 켜면 추가 비용 없음)
+- timings.run(): rerun 한 번을 감쌈. 그 사이 기록된 단계 시간을 스레드(= 세션 실행)별로 합쳐
+  rerun 한 줄짜리 JSON 으로 모아 둠
+- 출력 폴더를 지정하면(configure) FLUSH_INTERVAL 마다 rerun 끝에서 한꺼번에 기록
+  · timings.jsonl  rerun 당 한 줄 {"ts", "rerun_ms", "stages": {단계: ms}} (MAX_JSONL_BYTES 넘으면 .1 로 교체)
+  · metrics.prom   Prometheus 텍스트 형식 summary (node_exporter textfile collector 용, 원자적 교체)
+- summary(): 단계별 last/p50/p95/count (디버그 패널용, 호출할 때만 분위수 계산)
+
+스트림릿에 의존하지 않으므로 catalog/images 모듈도 같은 레지스트리(timings)에 기록.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+WINDOW = 512            # 단계별 분위수 계산에 쓰는 최근 기록 수
+FLUSH_INTERVAL = 5.0    # 초
+MAX_JSONL_BYTES = 10 * 1024 * 1024
+METRIC = "smartcup_stage_seconds"
+
+
+class Timings:
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._recent = {}    # 단계 → deque(초)
+        self._count = {}
+        self._sum = {}
+        self._local = threading.local()   # 진행 중인 rerun 의 단계별 합
+        self._lines = []                  # 아직 안 쓴 JSONL 줄
+        self._out_dir = None
+        self._last_flush = time.monotonic()
+
+    def configure(self, out_dir: Path):
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._out_dir = out_dir
+
+    def reset(self):
+        """누적 기록을 비움 (벤치마크에서 데이터 크기마다 새로 재기 위해)"""
+        with self._lock:
+            self._recent.clear()
+            self._count.clear()
+            self._sum.clear()
+            self._lines.clear()
+
+    # ----- 기록 -----
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            recent = self._recent.get(name)
+            if recent is None:
+                recent = self._recent[name] = deque(maxlen=self.window)
+                self._count[name] = 0
+                self._sum[name] = 0.0
+            recent.append(seconds)
+            self._count[name] += 1
+            self._sum[name] += seconds
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run[name] = run.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    @contextmanager
+    def run(self, name: str = "rerun"):
+        """rerun 한 번 (st.rerun() 같은 제어 흐름 예외로 빠져나가도 기록)"""
+        self._local.run = stages = {}
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - t0
+            self._local.run = None
+            self.record(name, total)
+            if self._out_dir is not None:
+                line = json.dumps({
+                    "ts": round(time.time(), 3),
+                    f"{name}_ms": round(total * 1e3, 3),
+                    "stages": {k: round(v * 1e3, 3) for k, v in stages.items()},
+                }, ensure_ascii=False)
+                with self._lock:
+                    self._lines.append(line)
+                    due = time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+                if due:
+                    self.flush()
+
+    # ----- 조회 -----
+    def summary(self) -> dict:
+        """단계 → {"last", "p50", "p95"} (ms) + "count" — 단계 이름순"""
+        with self._lock:
+            data = {k: (list(v), self._count[k]) for k, v in self._recent.items()}
+        out = {}
+        for name in sorted(data):
+            recent, count = data[name]
+            arr = np.asarray(recent) * 1e3
+            p50, p95 = np.percentile(arr, [50, 95])
+            out[name] = {"last": float(arr[-1]), "p50": float(p50), "p95": float(p95), "count": count}
+        return out
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            data = {k: (list(v), self._count[k], self._sum[k]) for k, v in self._recent.items()}
+        lines = [
+            f"# HELP {METRIC} Wall time per app stage (quantiles over the last {self.window} samples).",
+            f"# TYPE {METRIC} summary",
+        ]
+        for name in sorted(data):
+            recent, count, total = data[name]
+            p50, p95 = np.percentile(recent, [50, 95])
+            lines += [
+                f'{METRIC}{{stage="{name}",quantile="0.5"}} {p50:.6f}',
+                f'{METRIC}{{stage="{name}",quantile="0.95"}} {p95:.6f}',
+                f'{METRIC}_sum{{stage="{name}"}} {total:.6f}',
+                f'{METRIC}_count{{stage="{name}"}} {count}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    # ----- 출력 -----
+    def flush(self):
+        if self._out_dir is None:
+            return
+        with self._lock:
+            lines, self._lines = self._lines, []
+            self._last_flush = time.monotonic()
+        try:
+            jsonl = self._out_dir / "timings.jsonl"
+            if lines:
+                if jsonl.exists() and jsonl.stat().st_size > MAX_JSONL_BYTES:
+                    os.replace(jsonl, jsonl.with_suffix(".jsonl.1"))
+                with open(jsonl, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            prom = self._out_dir / "metrics.prom"
+            tmp = prom.with_name(f"metrics.prom.{os.getpid()}.tmp")
+            tmp.write_text(self.prometheus_text(), encoding="utf-8")
+            os.replace(tmp, prom)   # 수집기가 반쯤 쓴 파일을 읽지 않도록
+        except OSError:
+            pass   # 계측 때문에 화면이 깨지면 안 됨 — 다음 주기에 다시
+
+
+timings = Timings()   # 프로세스 전체 공유
@@ -0,0 +1,101 @@
+# planner.py
+"""
+하루 섭취 플래너: 영양/가격 예산 안에서 음료 k 잔 조합 중 선호 점수 합이 큰 상위 N 개.
+
+- 분기 한정(branch and bound): 후보를 점수 내림차순으로 정렬하고 조합을 인덱스 오름차순으로 전개
+  · 상한: 지금 점수 + 남은 후보 중 앞쪽 r 개(= 가장 높은 r 개) 점수 합 → 상위 N 번째보다 못하면 이후 전부 가지치기
+  · 실현 가능성: 남은 예산 < r × (이후 후보의 컬럼별 최솟값) 이면 가지치기
+  · 마지막 한 잔은 numpy 로 한 번에 (예산 안 후보 중 점수 순 앞쪽 N 개)
+- 혼자서도 예산을 넘는 음료는 미리 제외
+- 탐색 노드 수 상한(max_nodes)을 넘으면 그때까지의 최선을 돌려주고 exact=False
+"""
+import heapq
+
+import numpy as np
+
+# (라벨, 컬럼, 단위, 기본 예산) — 예산은 "하루 합계 이하"
+PLAN_BUDGETS = [
+    ("카페인", "Caffeine (mg)", "mg", 400),
+    ("당", "Sugar (g)", "g", 25),
+    ("칼로리", "Calories (kcal)", "kcal", 2000),
+    ("가격", "Price (KRW)", "원", 10000),
+]
+# 선호 점수 (클수록 좋음): 라벨 → (컬럼, 부호)
+OBJECTIVES = {
+    "용량 많이": ("Volume (ml)", 1.0),
+    "칼로리 적게": ("Calories (kcal)", -1.0),
+    "당 적게": ("Sugar (g)", -1.0),
+    "가격 적게": ("Price (KRW)", -1.0),
+}
+
+
+def plan(values: np.ndarray, limits, scores: np.ndarray, k: int, top_n: int = 5, max_nodes: int = 200_000):
+    """
+    values: (n, m) 예산 컬럼 값, limits: 길이 m 예산, scores: (n,) 선호 점수, k: 잔 수
+    → (조합 (t, k) 행 번호 — 점수 합 내림차순, 점수 합 (t,), exact)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    limits = np.asarray(limits, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    empty = (np.empty((0, k), dtype=np.int32), np.empty(0), True)
+    if k < 1:
+        return empty
+
+    # 혼자서 예산을 넘거나(결측 포함) k-1 잔을 가장 적은 값으로 채워도 넘는 음료 제외
+    ok = np.isfinite(values).all(axis=1) & np.isfinite(scores) & (values <= limits).all(axis=1)
+    if ok.any() and k > 1:
+        ok &= (values + (k - 1) * values[ok].min(axis=0) <= limits).all(axis=1)
+    idx = np.flatnonzero(ok)
+    if len(idx) < k:
+        return empty
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    V, S = values[idx], scores[idx]
+    n = len(idx)
+    cum = np.concatenate(([0.0], np.cumsum(S)))
+    sufmin = np.full((n + 1, V.shape[1]), np.inf)
+    sufmin[:n] = np.minimum.accumulate(V[::-1], axis=0)[::-1]
+
+    heap = []          # (점수 합, -순번, 조합) 최소 힙 — 상위 top_n 유지
+    counter = [0]
+    nodes = [0]
+
+    def push(total, combo):
+        counter[0] += 1
+        item = (total, -counter[0], combo)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif total > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def threshold():
+        return heap[0][0] if len(heap) == top_n else -np.inf
+
+    def last(start, rem, cur, chosen):
+        # 마지막 한 잔: 예산 안 후보는 이미 점수 순이므로 앞쪽 top_n 개만 보면 됨
+        feasible = start + np.flatnonzero((V[start:] <= rem).all(axis=1))
+        for j in feasible[:top_n].tolist():
+            if cur + S[j] <= threshold():
+                break
+            push(cur + S[j], chosen + (j,))
+
+    def dfs(start, r, rem, cur, chosen):
+        if r == 1:
+            last(start, rem, cur, chosen)
+            return
+        for j in range(start, n - r + 1):
+            nodes[0] += 1
+            if nodes[0] > max_nodes:
+                return
+            if cur + cum[j + r] - cum[j] <= threshold():
+                break   # 이후 후보는 점수가 더 낮으므로 상한도 더 낮음
+            if (r * sufmin[j] > rem).any():
+                break   # 이후 어떤 조합도 예산 초과 (suffix 최솟값은 j 가 커질수록 커짐)
+            new_rem = rem - V[j]
+            if ((r - 1) * sufmin[j + 1] > new_rem).any():
+                continue
+            dfs(j + 1, r - 1, new_rem, cur + S[j], chosen + (j,))
+
+    dfs(0, k, limits, 0.0, ())
+    best = sorted(heap, reverse=True)
+    combos = np.array([idx[list(c)] for _, _, c in best], dtype=np.int32).reshape(-1, k)
+    return combos, np.array([t for t, _, _ in best]), nodes[0] <= max_nodes
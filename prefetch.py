@@ -0,0 +1,129 @@
+# prefetch.py
+"""
+유휴 시간 백그라운드 프리페치: 다음에 누를 가능성이 큰 화면(다음 페이지/보이는 카드의 상세)을 미리 준비.
+
+- 프로세스당 하나(앱은 st.cache_resource), 작은 스레드 풀(workers)을 모든 세션이 공유
+- schedule(session, state, jobs): 세션의 화면 상태 키(카탈로그 버전 + QuerySpec + 페이지)마다 한 번만 예약
+  · 같은 세션이 다른 상태로 다시 예약하면 이전 작업 중 아직 시작 안 한 것은 취소,
+    이미 돌고 있는 작업은 단계 사이에서 current() 로 확인해 그만둠
+  · cancel(session): 세션의 새 rerun 이 시작될 때 호출 — 화면 경로와 CPU 를 다투지 않도록 하던 일을 멈춤
+    (이미 데운 캐시는 그대로라 같은 상태로 다시 예약하면 남은 것만 금방 끝남)
+  · 대기 작업이 max_pending 을 넘으면 새 작업은 버림 (최선 노력 — 놓쳐도 화면은 평소처럼 계산)
+- 페이지 행 조각은 (상태 키, offset, limit) → DataFrame 작은 LRU 에 보관, take_page() 로 한 번 꺼내 씀
+- 이미지 축소본/썸네일 data URI 는 images 모듈의 디스크/메모리 캐시를 데우는 것으로 충분
+- Future.cancel() 은 락 밖에서 부름 (취소는 부른 스레드에서 완료 처리가 돌므로 락을 잡은 채면 교착 위험)
+  (대기 작업 취소/예약 교체가 멈추지 않는지는 tests/test_prefetch.py)
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import timings
+
+MAX_SESSIONS = 4096     # 상태 키를 기억하는 세션 수 (오래된 세션부터 잊음)
+
+
+class Prefetcher:
+    def __init__(self, workers: int = None, max_pending: int = 32, max_pages: int = 256):
+        workers = workers or min(2, os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()   # 세션 → 가장 최근 상태 키
+        self._futures = {}             # 세션 → 그 상태의 Future 목록
+        self._pending = 0
+        self.max_pending = max_pending
+        self._pages = OrderedDict()    # (상태 키, offset, limit) → DataFrame
+        self.max_pages = max_pages
+        self.counts = {"scheduled": 0, "done": 0, "cancelled": 0, "failed": 0, "dropped": 0, "page_hits": 0}
+
+    # ----- 예약 / 취소 -----
+    def schedule(self, session, state, jobs):
+        """jobs: 인자 없는 함수들. 이 세션의 마지막 상태와 같으면 이미 예약된 것이므로 무시"""
+        with self._lock:
+            if self._latest.get(session) == state:
+                return
+            self._latest[session] = state
+            self._latest.move_to_end(session)
+            while len(self._latest) > MAX_SESSIONS:
+                old, _ = self._latest.popitem(last=False)
+                self._futures.pop(old, None)
+            stale = self._futures.pop(session, ())
+        self._cancel_futures(stale)
+        with self._lock:
+            if self._latest.get(session) != state:   # 그 사이 같은 세션이 다시 바뀜
+                return
+            futures = []
+            for job in jobs:
+                if self._pending >= self.max_pending:
+                    self.counts["dropped"] += 1
+                    continue
+                self._pending += 1
+                self.counts["scheduled"] += 1
+                futures.append(self._pool.submit(self._run, session, state, job))
+            self._futures[session] = futures
+
+    def cancel(self, session):
+        with self._lock:
+            if session in self._latest:
+                self._latest[session] = None
+            stale = self._futures.pop(session, ())
+        self._cancel_futures(stale)
+
+    def _cancel_futures(self, futures):
+        """시작 전인 작업 취소 (락 밖에서). 취소된 작업은 _run 이 돌지 않으므로 대기 수를 여기서 줄임"""
+        n = sum(1 for f in futures if f.cancel())
+        if n:
+            with self._lock:
+                self._pending -= n
+                self.counts["cancelled"] += n
+
+    def current(self, session, state) -> bool:
+        """작업 도중 확인용: 세션이 아직 이 상태인지"""
+        with self._lock:
+            return self._latest.get(session) == state
+
+    def _run(self, session, state, job):
+        outcome = "cancelled"
+        try:
+            if not self.current(session, state):   # 대기 중에 화면이 바뀜
+                return
+            with timings.stage("prefetch"):
+                job()
+            outcome = "done"
+        except Exception:
+            outcome = "failed"   # 미리 하는 일이 실패해도 화면 경로에서 다시 계산하면 됨
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    # ----- 페이지 조각 -----
+    def put_page(self, key, frame):
+        with self._lock:
+            self._pages[key] = frame
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def has_page(self, key) -> bool:
+        with self._lock:
+            return key in self._pages
+
+    def take_page(self, key):
+        """미리 만든 페이지 (없으면 None). 꺼낸 항목은 지움"""
+        with self._lock:
+            frame = self._pages.pop(key, None)
+            if frame is not None:
+                self.counts["page_hits"] += 1
+            return frame
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts, pending=self._pending, pages=len(self._pages))
+
+    def shutdown(self, wait: bool = False):
+        """대기 작업 취소 + 도는 작업은 다음 current() 확인에서 멈춤. wait=True 면 그때까지 기다림"""
+        with self._lock:
+            self._latest.clear()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,233 @@
+# query.py
+"""
+검색 + 필터 + 정렬 질의.
+
+- QuerySpec: 화면 상태(검색어/카페/카테고리/온도/슬라이더/정렬/즐겨찾기)를 정규화한 불변 질의
+  (기본값과 같은 조건은 빼서 "전체 보기"와 "슬라이더 끝까지"가 같은 키가 되도록)
+- execute(): 카탈로그 인덱스로 질의 실행 → 정렬된 행 위치 (파레토 모드는 지배 순위 순)
+- facet_counts(): 카페/카테고리/온도 값별 결과 수 (각 패싯은 자기 선택만 빼고 나머지 조건 적용)
+- slider_histograms(): 슬라이더 컬럼별 고정 구간 히스토그램 (같은 규칙: 자기 범위만 빼고)
+- QueryCache: 프로세스 전체가 공유하는 LRU (스레드 안전, 카탈로그 버전이 바뀌면 비움)
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from catalog import ID_COL
+from filters import HIST_BINS, RANGE_COLS
+from pareto import dominance_rank, pareto_order
+from perf import timings
+from search import normalize_query
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    q: str = ""                 # 토큰별 정규화 후 공백으로 연결
+    cafes: tuple = None         # None = 제약 없음
+    categories: tuple = None
+    temp: str = None
+    ranges: tuple = ()          # ((컬럼, lo, hi), ...) 컬럼 이름순, 전체 범위인 조건은 제외
+    sort_keys: tuple = ()       # ((컬럼, 오름차순), ...) — 비면 관련도/기본 순서
+    favorites: bytes = None     # 즐겨찾기만 보기일 때 즐겨찾기 id 다이제스트 (아니면 None)
+    pareto: tuple = ()          # 파레토 모드 축 (컬럼 이름순) — 있으면 sort_keys 대신 지배 순위 순
+
+
+def _canon_choice(selected, all_values):
+    """빈 선택/전체 선택은 제약 없음(None), 그 외는 정렬된 튜플"""
+    if not selected:
+        return None
+    chosen = tuple(sorted(set(map(str, selected))))
+    return None if set(chosen) >= set(map(str, all_values)) else chosen
+
+
+def make_spec(catalog, q="", cafes=None, categories=None, temp=None, ranges=None,
+              sort_keys=(), favorites=None, pareto=()) -> QuerySpec:
+    """
+    화면 상태 → 정규화된 QuerySpec.
+    favorites: 즐겨찾기만 보기일 때 item_id 배열 (아니면 None)
+    pareto: 파레토 모드 축 컬럼들 (축 순서는 결과와 무관하므로 정렬해서 키로 사용)
+    """
+    pareto = tuple(sorted(set(pareto or ())))
+    q_norm = " ".join(t for t in (normalize_query(t) for t in str(q or "").split()) if t)
+    canon_ranges = []
+    for col, (lo, hi) in sorted((ranges or {}).items()):
+        if lo <= 0 and hi >= catalog.bounds[col]:
+            continue
+        canon_ranges.append((col, lo, hi))
+    fav = None
+    if favorites is not None:
+        ids = np.unique(np.asarray(favorites, dtype=np.int32))
+        fav = hashlib.sha1(ids.tobytes()).digest()[:12]
+    return QuerySpec(
+        q=q_norm,
+        cafes=_canon_choice(cafes, catalog.cafes),
+        categories=_canon_choice(categories, catalog.categories),
+        temp=temp,
+        ranges=tuple(canon_ranges),
+        sort_keys=() if pareto else tuple((col, bool(asc)) for col, asc in sort_keys),
+        favorites=fav,
+        pareto=pareto,
+    )
+
+
+FACET_COLS = ("Cafe", "Category", "Temperature")
+
+
+def _cats(spec: QuerySpec) -> dict:
+    return {
+        "Cafe": spec.cafes,
+        "Category": spec.categories,
+        "Temperature": None if spec.temp is None else [spec.temp],
+    }
+
+
+def _ranges(spec: QuerySpec) -> dict:
+    return {col: (lo, hi) for col, lo, hi in spec.ranges}
+
+
+def execute(catalog, spec: QuerySpec, favorites=None, with_ranks: bool = False):
+    """
+    질의 실행 → 정렬된 행 위치. favorites 는 spec.favorites 가 있을 때 쓰는 item_id 배열.
+    with_ranks=True 면 (위치, 지배 순위) — 파레토 모드에서 정렬에 쓴 순위를 그대로 (아니면 None)
+    """
+    hits = None
+    ranks = None
+    if spec.q:
+        with timings.stage("search"):
+            hits = catalog.search.search(spec.q)
+    with timings.stage("filter"):
+        positions = catalog.filters.positions(_ranges(spec), _cats(spec), within=hits)
+        if spec.favorites is not None:
+            item_ids = catalog.df[ID_COL].to_numpy()
+            positions = positions[np.isin(item_ids[positions], favorites)]
+    if spec.pareto:
+        with timings.stage("sort_pareto"):
+            # 동순위는 행 위치 순 (검색 관련도 순서는 쓰지 않음 — 다른 정렬과 같은 규칙)
+            positions = np.sort(positions)
+            order, ranks = pareto_order(catalog.df[list(spec.pareto)].to_numpy()[positions])
+            positions = positions[order]
+    elif spec.sort_keys:
+        with timings.stage("sort"):
+            positions = catalog.filters.sort_positions(positions, spec.sort_keys)
+    return (positions, ranks) if with_ranks else positions
+
+
+def pareto_ranks(catalog, spec: QuerySpec, positions: np.ndarray) -> np.ndarray:
+    """
+    execute() 결과 위치(파레토 모드)의 지배 순위를 다시 계산.
+    보통은 execute(with_ranks=True) 결과를 같이 캐시하므로, 순위만 캐시에서 밀려났을 때의 대체 경로
+    """
+    return dominance_rank(catalog.df[list(spec.pareto)].to_numpy()[positions])
+
+
+def _within(catalog, spec: QuerySpec, favorites=None):
+    """검색어/즐겨찾기로 좁힌 후보 행 위치 (둘 다 없으면 None = 전체)"""
+    within = catalog.search.search(spec.q) if spec.q else None
+    if spec.favorites is not None:
+        fav_pos = catalog.positions_of(favorites if favorites is not None else [])
+        within = fav_pos if within is None else within[np.isin(within, fav_pos)]
+    return within
+
+
+def facet_counts(catalog, spec: QuerySpec, favorites=None) -> np.ndarray:
+    """
+    FACET_COLS 순으로 값별 개수를 이어 붙인 배열 (값 순서는 FilterEngine.code_of).
+    각 패싯은 자기 선택만 빼고 검색어/슬라이더/다른 패싯/즐겨찾기를 적용 — "이걸 고르면 몇 개"
+    배열 하나라 QueryCache 에 그대로 넣을 수 있음 (split_facets 로 {컬럼: {값: 개수}})
+    """
+    within = _within(catalog, spec, favorites)
+    ranges, cats = _ranges(spec), _cats(spec)
+    return np.concatenate([
+        catalog.filters.value_counts(col, ranges, {c: v for c, v in cats.items() if c != col}, within=within)
+        for col in FACET_COLS
+    ])
+
+
+def slider_histograms(catalog, spec: QuerySpec, favorites=None) -> np.ndarray:
+    """
+    (len(RANGE_COLS), HIST_BINS + 1) 배열. 행마다 슬라이더 컬럼 하나:
+    [:HIST_BINS] = 자기 범위만 빼고 나머지 조건을 만족하는 행의 구간별 개수, [HIST_BINS] = 그중 현재 범위 안 개수
+    """
+    within = _within(catalog, spec, favorites)
+    ranges, cats = _ranges(spec), _cats(spec)
+    out = np.empty((len(RANGE_COLS), HIST_BINS + 1), dtype=np.int64)
+    for i, col in enumerate(RANGE_COLS):
+        others = {c: r for c, r in ranges.items() if c != col}
+        out[i, :HIST_BINS] = catalog.filters.histogram(col, others, cats, within=within)
+        if col in ranges:
+            out[i, HIST_BINS] = len(catalog.filters.positions(ranges, cats, within=within))
+        else:
+            out[i, HIST_BINS] = out[i, :HIST_BINS].sum()
+    return out
+
+
+def split_facets(catalog, counts: np.ndarray) -> dict:
+    out, i = {}, 0
+    for col in FACET_COLS:
+        code_of = catalog.filters.code_of[col]
+        out[col] = {v: int(counts[i + code]) for v, code in code_of.items()}
+        i += len(code_of)
+    return out
+
+
+class QueryCache:
+    """
+    (카탈로그 버전, QuerySpec) → 행 위치 배열. 프로세스 전체 공유 LRU.
+    파생 결과는 (종류, QuerySpec) 키로 같이 보관 — ("rank", spec) 파레토 순위, ("facets", spec) 패싯 개수.
+    항목 수(maxsize)와 결과 배열 총 바이트(max_bytes) 둘 다로 제한.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, version: str, spec: QuerySpec, compute) -> np.ndarray:
+        with self._lock:
+            if version != self._version:   # 카탈로그가 바뀌면 이전 결과는 모두 무효
+                self._data.clear()
+                self.nbytes = 0
+                self._version = version
+            positions = self._data.get(spec)
+            if positions is not None:
+                self._data.move_to_end(spec)
+                self.hits += 1
+                return positions
+            self.misses += 1
+        positions = compute()   # 락 밖에서 계산
+        positions.setflags(write=False)
+        with self._lock:
+            if version == self._version and spec not in self._data:
+                self._data[spec] = positions
+                self.nbytes += positions.nbytes
+                while len(self._data) > self.maxsize or (self.nbytes > self.max_bytes and len(self._data) > 1):
+                    _, old = self._data.popitem(last=False)
+                    self.nbytes -= old.nbytes
+        return positions
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
@@ -0,0 +1,406 @@
+# search.py
+"""
+검색 인덱스: 정규화 키(Name/Cafe/Category __norm) 위의 문자 n-gram 역색인.
+
+- 일반 검색: 1/2/3-gram 포스팅 교집합으로 후보만 뽑고 → 후보만 검증 (전체 스캔 X)
+- 초성 검색: "ㅇㅁㄹㅋㄴ" → 아메리카노 (초성 문자열에 대해 같은 방식의 역색인)
+- 입력 중인 글자: 마지막 글자는 자모 단위 접두어로 비교 ("아멜" → 아메리카노)
+- 검증/점수: 필드별 문자 코드 배열(_FieldCodes)에서 후보 행만 모아 numpy 로 첫 일치 위치를 구함
+  ("아", "ㄹ" 처럼 후보가 수만 개인 짧은 질의도 파이썬 반복 없이)
+- 색인은 numpy 배열로만 구성 → arrays()/from_arrays() 로 스냅샷 파일에 저장/memory-map 복원 (catalog.load_snapshot)
+- 결과는 관련도 순 행 위치(np.ndarray)
+"""
+import numpy as np
+
+from catalog import norm_key
+
+# =========================
+# 한글 자모 분해
+# =========================
+_SBASE, _SEND = 0xAC00, 0xD7A3
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+         "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 겹받침/겹모음은 입력 순서대로 풀어서 비교 ("닭" 입력 중 "달" 도 접두어가 되도록)
+_SPLIT = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+_CONSONANTS = set(_CHO) | {j for j in _JONG if j}
+
+# NFKC(norm_key)는 호환 자모(ㄱ, U+3131~)를 첫가끝 자모(U+1100~)로 바꾸므로 되돌림
+_TO_COMPAT = {}
+_TO_COMPAT.update({0x1100 + i: c for i, c in enumerate(_CHO)})
+_TO_COMPAT.update({0x1161 + i: c for i, c in enumerate(_JUNG)})
+_TO_COMPAT.update({0x11A8 + i: c for i, c in enumerate(_JONG[1:])})
+
+
+def normalize_query(s: str) -> str:
+    """검색어 정규화: norm_key + 낱자모를 호환 자모로"""
+    return norm_key(s).translate(_TO_COMPAT)
+
+
+def decompose(s: str) -> str:
+    """완성형 한글 → 호환 자모 나열 (그 외 문자는 그대로)"""
+    out = []
+    for ch in s:
+        code = ord(ch)
+        if _SBASE <= code <= _SEND:
+            idx = code - _SBASE
+            parts = (_CHO[idx // 588], _JUNG[(idx % 588) // 28], _JONG[idx % 28])
+            out.extend(_SPLIT.get(p, p) for p in parts)
+        else:
+            out.append(_SPLIT.get(ch, ch))
+    return "".join(out)
+
+
+def is_chosung_query(q: str) -> bool:
+    return bool(q) and all(ch in _CONSONANTS for ch in q)
+
+
+# =========================
+# n-gram 역색인 (numpy 로 한 번에 구성, CSR 형태)
+# =========================
+_CHO_CP = np.array([ord(c) for c in _CHO], dtype=np.uint64)
+
+
+def _sorted_unique(a: np.ndarray) -> np.ndarray:
+    """정렬 + 인접 비교로 중복 제거 (큰 uint64 배열에서 np.unique 보다 빠름)"""
+    a = np.sort(a)
+    return a[np.r_[True, a[1:] != a[:-1]]] if len(a) else a
+
+
+def _grams(s: str, n: int):
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+def _codepoints(keys: list):
+    """문자열 목록 → (코드포인트 배열, 각 문자의 행 위치)"""
+    lens = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    cps = np.frombuffer("".join(keys).encode("utf-32-le"), dtype="<u4").astype(np.uint64)
+    rows = np.repeat(np.arange(len(keys), dtype=np.int32), lens)
+    return cps, rows
+
+
+def _chosung_cps(cps: np.ndarray) -> np.ndarray:
+    """완성형 한글 코드포인트 → 초성 호환 자모 코드포인트 (그 외는 그대로)"""
+    out = cps.copy()
+    hangul = (cps >= _SBASE) & (cps <= _SEND)
+    out[hangul] = _CHO_CP[(cps[hangul] - _SBASE) // 588]
+    return out
+
+
+def _window_ids(codes: np.ndarray, rows: np.ndarray, n: int, bits: int):
+    """길이 n 창마다 (gram id, 행 위치). 행(키) 경계를 넘는 창은 제외. id = 문자 코드(bits 비트)를 이어붙임"""
+    m = len(codes) - n + 1
+    if m <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32)
+    gid = codes[:m].copy()
+    for k in range(1, n):
+        gid = (gid << np.uint64(bits)) | codes[k:k + m]
+    ok = rows[:m] == rows[n - 1:n - 1 + m]
+    return gid[ok], rows[:m][ok]
+
+
+class _Postings:
+    """gram id(정렬, 중복 없음) → offsets → 행 위치(int32, gram 마다 정렬/중복 없음)"""
+
+    def __init__(self, gids: np.ndarray, rows: np.ndarray, n_rows: int):
+        row_bits = max(int(n_rows - 1).bit_length(), 1)
+        gid_bits = int(gids.max()).bit_length() if len(gids) else 0
+        if gid_bits + row_bits <= 64:
+            # (gram, 행) 을 uint64 하나로 합쳐 한 번에 정렬+중복 제거 (lexsort 보다 훨씬 빠름)
+            keys = _sorted_unique((gids << np.uint64(row_bits)) | rows.astype(np.uint64))
+            g = keys >> np.uint64(row_bits)
+            r = (keys & np.uint64((1 << row_bits) - 1)).astype(np.int32)
+        else:
+            order = np.lexsort((rows, gids))
+            g, r = gids[order], rows[order]
+            keep = np.ones(len(g), dtype=bool)
+            keep[1:] = (g[1:] != g[:-1]) | (r[1:] != r[:-1])
+            g, r = g[keep], r[keep].astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]]) if len(g) else np.empty(0, dtype=np.int64)
+        self.grams = g[starts]
+        self.offsets = np.append(starts, len(g)).astype(np.int64)
+        self.rows = r
+
+    @classmethod
+    def from_arrays(cls, grams, offsets, rows):
+        self = cls.__new__(cls)
+        self.grams, self.offsets, self.rows = grams, offsets, rows
+        return self
+
+    def get(self, gid: int):
+        i = int(np.searchsorted(self.grams, np.uint64(gid)))
+        if i == len(self.grams) or int(self.grams[i]) != gid:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.grams)
+
+
+class _FieldCodes:
+    """필드 하나의 키들을 문자 코드로 이어 붙인 배열 (행마다 끝에 0) + 행별 시작 칸/길이"""
+
+    def __init__(self, codes: np.ndarray, rows: np.ndarray, n_rows: int, dtype):
+        self.lens = np.bincount(rows, minlength=n_rows).astype(np.int64)
+        self.starts = np.cumsum(self.lens + 1) - (self.lens + 1)
+        self.codes = np.zeros(len(codes) + n_rows, dtype=dtype)
+        self.codes[np.arange(len(codes)) + rows] = codes   # 앞 행들의 구분자(0) 수만큼 밀림
+
+    @classmethod
+    def from_arrays(cls, codes, starts, lens):
+        self = cls.__new__(cls)
+        self.codes, self.starts, self.lens = codes, starts, lens
+        return self
+
+    def gather(self, cand: np.ndarray):
+        """후보 행들의 코드를 (구분자 포함) 이어 붙임 → (코드, 후보별 시작 칸, 후보별 길이)"""
+        lens = self.lens[cand]
+        first = np.cumsum(lens + 1) - (lens + 1)
+        flat = np.arange(int(first[-1] + lens[-1] + 1)) + np.repeat(self.starts[cand] - first, lens + 1)
+        return self.codes[flat], first, lens
+
+
+def _first_match(sub: np.ndarray, first: np.ndarray, head: list, last=None):
+    """
+    gather() 결과에서 head(코드 목록) + 마지막 글자 조건이 처음 맞는 곳 → (후보 번호, 행 안 위치).
+    last = (다음 문자 표, [(앞 문자 표, 그다음 문자 표), ...]) — head 뒤 두 글자의 자모가 마지막 글자 자모로 시작하는지
+    """
+    total = len(sub)
+    pad = np.concatenate([sub, np.zeros(len(head) + 2, dtype=sub.dtype)])   # 구분자(0)는 어떤 조건도 안 맞음
+    hit = np.ones(total, dtype=bool)
+    for k, code in enumerate(head):
+        hit &= pad[k:k + total] == code
+    if last is not None:
+        a, b = pad[len(head):len(head) + total], pad[len(head) + 1:len(head) + 1 + total]
+        ok, pairs = last
+        cond = ok[a]
+        for pre, nxt in pairs:
+            cond |= pre[a] & nxt[b]
+        hit &= cond
+    idx = np.flatnonzero(hit)
+    owner = np.searchsorted(first, idx, side="right") - 1
+    keep = np.r_[True, owner[1:] != owner[:-1]] if len(owner) else np.empty(0, dtype=bool)
+    owner = owner[keep]
+    return owner, idx[keep] - first[owner]
+
+
+class _NgramIndex:
+    """필드별 키 목록 → n = 1, 2, 3 포스팅 (chosung=True 면 초성 문자열 기준, keep_codes=True 면 필드 코드 배열도)"""
+
+    def __init__(self, keys_by_field: list, n_rows: int, chosung: bool = False, keep_codes: bool = False):
+        field_cps = []
+        for keys in keys_by_field:
+            cps, rows = _codepoints(keys)
+            field_cps.append((_chosung_cps(cps) if chosung else cps, rows))
+        # 등장 문자만 1.. 로 번호를 매겨(수천 종) 3-gram + 행 위치가 uint64 하나에 들어가게
+        alphabet = _sorted_unique(np.concatenate([c for c, _ in field_cps] or [np.empty(0, np.uint64)]))
+        self._set_alphabet(alphabet, n_rows)
+        field_codes = [(np.searchsorted(alphabet, cps).astype(np.uint64) + np.uint64(1), rows)
+                       for cps, rows in field_cps]
+
+        self.postings = {}
+        for n in (1, 2, 3):
+            parts = [_window_ids(codes, rows, n, self.bits) for codes, rows in field_codes]
+            gids = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, dtype=np.uint64)
+            rows = np.concatenate([p[1] for p in parts]) if parts else np.empty(0, dtype=np.int32)
+            self.postings[n] = _Postings(gids, rows, n_rows)
+        self.field_codes = [_FieldCodes(codes, rows, n_rows, self.code_dtype)
+                            for codes, rows in field_codes] if keep_codes else []
+
+    def _set_alphabet(self, alphabet: np.ndarray, n_rows: int):
+        self.alphabet = alphabet
+        self.code_of = {chr(int(cp)): i + 1 for i, cp in enumerate(alphabet.tolist())}
+        self.bits = max(len(alphabet).bit_length(), 1)
+        self.code_dtype = np.uint16 if len(alphabet) < 1 << 16 else np.uint32
+        self.n_rows = n_rows
+        self._char_jamo = None
+        self._jamo_tables = {}
+
+    def arrays(self, prefix: str) -> dict:
+        out = {f"{prefix}alphabet": self.alphabet}
+        for n, p in self.postings.items():
+            out.update({f"{prefix}{n}.grams": p.grams, f"{prefix}{n}.offsets": p.offsets, f"{prefix}{n}.rows": p.rows})
+        for i, fc in enumerate(self.field_codes):
+            out.update({f"{prefix}field{i}.codes": fc.codes, f"{prefix}field{i}.starts": fc.starts,
+                        f"{prefix}field{i}.lens": fc.lens})
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, prefix: str, n_rows: int, n_fields: int = 0):
+        """arrays() 결과(읽기 전용 memory-map 배열이어도 됨)로 다시 계산 없이 복원"""
+        self = cls.__new__(cls)
+        self._set_alphabet(arrays[f"{prefix}alphabet"], n_rows)
+        self.postings = {n: _Postings.from_arrays(arrays[f"{prefix}{n}.grams"], arrays[f"{prefix}{n}.offsets"],
+                                                  arrays[f"{prefix}{n}.rows"]) for n in (1, 2, 3)}
+        self.field_codes = [_FieldCodes.from_arrays(arrays[f"{prefix}field{i}.codes"], arrays[f"{prefix}field{i}.starts"],
+                                                    arrays[f"{prefix}field{i}.lens"]) for i in range(n_fields)]
+        return self
+
+    def _gram_id(self, g: str):
+        """n-gram → gram id (색인에 없는 문자가 있으면 None)"""
+        v = 0
+        for ch in g:
+            code = self.code_of.get(ch)
+            if code is None:
+                return None
+            v = (v << self.bits) | code
+        return v
+
+    def candidates(self, s: str):
+        """s 를 부분문자열로 가질 수 있는 행 후보 (s 가 비면 None = 제한 없음)"""
+        if not s:
+            return None
+        n = min(3, len(s))
+        lists = []
+        for g in _grams(s, n):
+            gid = self._gram_id(g)
+            p = None if gid is None else self.postings[n].get(gid)
+            if p is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(p)
+        lists.sort(key=len)   # 짧은 포스팅부터 교집합
+        out = lists[0]
+        for p in lists[1:]:
+            out = np.intersect1d(out, p, assume_unique=True)
+            if not len(out):
+                break
+        return out
+
+    def _decomposed(self):
+        if self._char_jamo is None:   # 문자 종류(수천 개)만큼만, 처음 필요할 때 한 번
+            self._char_jamo = [(code, decompose(ch)) for ch, code in self.code_of.items()]
+        return self._char_jamo
+
+    def candidates_jamo_prefix(self, head: str, last: str):
+        """head 로 후보를 줄이되, head 가 비면 자모 접두어가 맞는 문자들의 포스팅 합집합"""
+        if head:
+            return self.candidates(head)
+        jl = decompose(last)
+        uni = self.postings[1]
+        hits = [uni.get(g) for g, jamo in self._decomposed() if jamo.startswith(jl)]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        return _sorted_unique(np.concatenate(hits))
+
+    def jamo_tables(self, last: str):
+        """
+        마지막 글자 조건을 문자 코드 표로: (자모가 last 로 시작하는 문자,
+        [(자모가 last 의 앞부분인 문자, 그다음 문자가 나머지로 시작하는지), ...] — 앞부분 길이별)
+        """
+        tables = self._jamo_tables.get(last)
+        if tables is not None:
+            return tables
+        jl = decompose(last)
+        size = len(self.alphabet) + 1
+        ok = np.zeros(size, dtype=bool)
+        partial = {}
+        for code, jamo in self._decomposed():
+            if jamo.startswith(jl):
+                ok[code] = True
+            elif jl.startswith(jamo):
+                partial.setdefault(len(jamo), []).append(code)
+        pairs = []
+        for k, codes in sorted(partial.items()):
+            pre, nxt = np.zeros(size, dtype=bool), np.zeros(size, dtype=bool)
+            pre[codes] = True
+            nxt[[code for code, jamo in self._decomposed() if jamo.startswith(jl[k:])]] = True
+            pairs.append((pre, nxt))
+        if len(self._jamo_tables) >= 256:
+            self._jamo_tables.clear()
+        self._jamo_tables[last] = tables = (ok, pairs)
+        return tables
+
+
+# =========================
+# 검색 인덱스
+# =========================
+FIELD_WEIGHTS = {"Name": 3.0, "Cafe": 2.0, "Category": 1.0}
+
+
+class SearchIndex:
+    def __init__(self, df, arrays: dict = None):
+        """arrays: 저장해 둔 arrays() 결과 (있으면 색인을 다시 만들지 않고 그대로 씀)"""
+        self.fields = [f for f in FIELD_WEIGHTS if f"{f}__norm" in df.columns]
+        self.n_rows = len(df)
+        if arrays is not None:
+            self.text = _NgramIndex.from_arrays(arrays, "search.text.", self.n_rows, len(self.fields))
+            self.cho = _NgramIndex.from_arrays(arrays, "search.cho.", self.n_rows)
+            self._cho_of = arrays["search.cho_of"]
+            return
+        # 키 문자열 목록은 색인을 만들 때만 (행 수만큼의 파이썬 str 이라 들고 있으면 워커마다 수십 MB)
+        keys = [df[f"{f}__norm"].astype(str).tolist() for f in self.fields]
+        self.text = _NgramIndex(keys, self.n_rows, keep_codes=True)
+        self.cho = _NgramIndex(keys, self.n_rows, chosung=True)
+        # 텍스트 문자 코드 → 초성 색인 문자 코드 (초성 검색도 같은 필드 코드 배열로 검증)
+        cho_codes = np.searchsorted(self.cho.alphabet, _chosung_cps(self.text.alphabet)) + 1
+        self._cho_of = np.r_[0, cho_codes].astype(self.cho.code_dtype)
+
+    def arrays(self) -> dict:
+        """색인 전체를 이름 → numpy 배열로 (스냅샷 저장용)"""
+        return {**self.text.arrays("search.text."), **self.cho.arrays("search.cho."), "search.cho_of": self._cho_of}
+
+    def _score_token(self, q: str):
+        """토큰 하나 → (행 위치 오름차순, 점수). head + (마지막 글자 자모 접두어) 의 필드별 첫 일치 위치로 점수"""
+        cho_mode = is_chosung_query(q)
+        if cho_mode:
+            index, head, last = self.cho, q, None
+            cand = self.cho.candidates(q)
+        else:
+            index, head, last = self.text, q[:-1], self.text.jamo_tables(q[-1])
+            cand = self.text.candidates_jamo_prefix(head, q[-1])
+        head_codes = [index.code_of.get(ch) for ch in head]
+        if not len(cand) or None in head_codes:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        best = np.zeros(len(cand))
+        for f, fc in zip(self.fields, self.text.field_codes):
+            sub, first, lens = fc.gather(cand)
+            if cho_mode:
+                sub = self._cho_of[sub]   # 초성 키는 후보만 변환
+            owner, at = _first_match(sub, first, head_codes, last)
+            key_len = lens[owner]
+            exact = (at == 0) & (key_len == len(q))
+            if not cho_mode:   # 마지막 글자는 자모 접두어로 맞췄으므로 완전일치는 글자까지 확인
+                exact &= sub[first[owner] + len(head)] == self.text.code_of.get(q[-1], 0)
+            s = FIELD_WEIGHTS[f] * np.where(exact, 3.0, np.where(at == 0, 1.5, 1.0))   # 완전일치 > 접두 > 부분
+            s += len(q) / np.maximum(key_len, 1)                                       # 짧은(더 구체적인) 이름 우선
+            best[owner] = np.maximum(best[owner], s)
+        keep = best > 0
+        return cand[keep].astype(np.int32, copy=False), best[keep]
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        질의 → 관련도 내림차순 행 위치.
+        - 공백 포함 질의는 (붙여 쓴 전체) ∪ (토큰 AND) 로 매칭 ("스타벅스 라떼")
+        """
+        q = normalize_query(query)
+        if not q:
+            return np.arange(self.n_rows, dtype=np.int32)
+
+        pos, val = self._score_token(q)
+        tokens = [normalize_query(t) for t in str(query).split()]
+        tokens = [t for t in tokens if t]
+        if len(tokens) > 1:
+            per_tok = [self._score_token(t) for t in tokens]
+            common = per_tok[0][0]
+            for p, _ in per_tok[1:]:
+                common = np.intersect1d(common, p, assume_unique=True)
+            total = np.zeros(len(common))
+            for p, s in per_tok:
+                total += s[np.searchsorted(p, common)]
+            # 같은 행이 양쪽에 있으면 큰 점수
+            pos, val = np.concatenate([pos, common]), np.concatenate([val, total / len(per_tok)])
+            order = np.lexsort((-val, pos))
+            pos, val = pos[order], val[order]
+            keep = np.r_[True, pos[1:] != pos[:-1]] if len(pos) else np.empty(0, dtype=bool)
+            pos, val = pos[keep], val[keep]
+
+        if not len(pos):
+            return np.empty(0, dtype=np.int32)
+        order = np.lexsort((pos, -val))   # 점수 내림차순, 동점은 카탈로그 순
+        return pos[order]
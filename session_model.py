@@ -0,0 +1,179 @@
+# session_model.py
+"""
+세션마다 들고 있는 사용자 상태를 작게: pandas 객체/파이썬 컬렉션 대신 정수만.
+
+- FavoriteBits: 즐겨찾기 item_id 비트셋 (bytearray, 가장 큰 id/8 바이트) — 포함 여부 O(1)
+- RecentRing:   최근 본 음료 item_id 고정 크기 int32 링 버퍼 (최신순, 중복 없음, 추가 시 새 배열 안 만듦)
+- SessionModel: 위 둘 + 상세 모달로 연 음료 id (__slots__ dataclass)
+  · 행 위치 대신 item_id 를 들고 있음 → 카탈로그가 다시 로딩돼도 유효, 위치는 catalog.id_to_pos 로 O(1)
+  · 저장(state_store)은 지금처럼 int32 배열로 주고받음 (ids())
+- session_bytes(): 세션 상태 값들의 대략적인 메모리(바이트) — 세션 1,000 개당 메모리 추적용
+
+    python session_model.py [N_FAVORITES]   # 예전 표현(Series/set/list) 대비 세션당 바이트 비교
+"""
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+RECENT_CAPACITY = 20
+
+
+class FavoriteBits:
+    """item_id 비트셋 (bit i = id i 가 즐겨찾기). 뒤쪽 0 바이트는 잘라서 가장 큰 id 까지만 유지"""
+
+    __slots__ = ("_bits",)
+
+    def __init__(self, ids=()):
+        self._bits = bytearray()
+        for item_id in np.asarray(ids, dtype=np.int64).tolist():
+            self.add(item_id)
+
+    def __contains__(self, item_id) -> bool:
+        i = int(item_id)
+        return 0 <= i and (i >> 3) < len(self._bits) and bool(self._bits[i >> 3] >> (i & 7) & 1)
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8)).sum())
+
+    def add(self, item_id: int):
+        i = int(item_id)
+        if i < 0:
+            return
+        if (i >> 3) >= len(self._bits):
+            self._bits.extend(bytes((i >> 3) + 1 - len(self._bits)))
+        self._bits[i >> 3] |= 1 << (i & 7)
+
+    def discard(self, item_id: int):
+        if item_id in self:
+            i = int(item_id)
+            self._bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+            while self._bits and not self._bits[-1]:
+                self._bits.pop()
+
+    def toggle(self, item_id: int) -> bool:
+        """토글 후 즐겨찾기 여부"""
+        if item_id in self:
+            self.discard(item_id)
+            return False
+        self.add(item_id)
+        return True
+
+    def ids(self) -> np.ndarray:
+        """즐겨찾기 item_id (오름차순 int32)"""
+        bits = np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits).astype(np.int32)
+
+
+class RecentRing:
+    """최근 본 item_id 링 버퍼. _head = 다음에 쓸 칸, 최신 = _head - 1"""
+
+    __slots__ = ("_buf", "_head", "_size")
+
+    def __init__(self, ids=(), capacity: int = RECENT_CAPACITY):
+        self._buf = np.full(capacity, -1, dtype=np.int32)
+        self._head = 0
+        self._size = 0
+        for item_id in np.asarray(ids, dtype=np.int64)[:capacity][::-1].tolist():   # ids 는 최신순
+            self.push(item_id)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _order(self) -> np.ndarray:
+        """최신순 물리 칸 번호"""
+        return (self._head - 1 - np.arange(self._size)) % len(self._buf)
+
+    def push(self, item_id: int):
+        """맨 앞(최신)에 추가. 이미 있으면 그 앞쪽만 한 칸씩 밀고 맨 앞으로 옮김 (길이 그대로)"""
+        order = self._order()
+        hit = np.flatnonzero(self._buf[order] == item_id)
+        if len(hit):
+            k = int(hit[0])
+            self._buf[order[1:k + 1]] = self._buf[order[:k]]
+            self._buf[order[0]] = item_id
+            return
+        self._buf[self._head] = item_id
+        self._head = (self._head + 1) % len(self._buf)
+        self._size = min(self._size + 1, len(self._buf))
+
+    def ids(self) -> np.ndarray:
+        """최근 본 item_id (최신순 int32 사본)"""
+        return self._buf[self._order()]
+
+
+@dataclass(slots=True)
+class SessionModel:
+    favorites: FavoriteBits = field(default_factory=FavoriteBits)
+    recent: RecentRing = field(default_factory=RecentRing)
+    detail: int = -1   # 상세 모달로 연 음료 item_id (-1 = 닫힘)
+
+    PERSISTED = ("favorites", "recent")   # state_store 에 int32 배열로 저장하는 필드
+
+    @classmethod
+    def from_saved(cls, saved: dict) -> "SessionModel":
+        return cls(FavoriteBits(saved["favorites"]), RecentRing(saved["recent"]))
+
+    def export(self, name: str) -> np.ndarray:
+        return getattr(self, name).ids()
+
+
+def deep_sizeof(obj, _seen=None) -> int:
+    """객체가 붙잡고 있는 메모리(바이트) 대략치. 같은 객체는 한 번만 셈"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.Series, pd.DataFrame, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    size = sys.getsizeof(obj)   # ndarray 는 자기 데이터 포함, 뷰는 헤더만
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif hasattr(type(obj), "__slots__") and not isinstance(obj, np.ndarray):
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(obj, name):
+                    size += deep_sizeof(getattr(obj, name), seen)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_bytes(state) -> int:
+    """세션 상태(st.session_state 또는 dict) 값 전체의 바이트 수"""
+    items = state.to_dict() if hasattr(state, "to_dict") else dict(state)
+    seen = set()
+    return sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in items.items())
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+
+    from catalog import ID_COL, load_catalog
+
+    n_fav = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    df = load_catalog(Path(__file__).parent / "smartcup_final_6.csv").df
+    rng = np.random.default_rng(0)
+    fav = rng.choice(df[ID_COL].to_numpy(), size=min(n_fav, len(df)), replace=False)
+    rec = rng.choice(df[ID_COL].to_numpy(), size=min(RECENT_CAPACITY, len(df)), replace=False)
+    key = lambda i: f"{df['Cafe'].iloc[i]}|{df['Temperature'].iloc[i]}|{df['Name'].iloc[i]}"   # 예전 문자열 키
+
+    legacy = {"detail_row": df.iloc[int(rec[0])].copy(),
+              "favorites": {key(int(i)) for i in fav},
+              "recent": [key(int(i)) for i in rec]}
+    arrays = {"detail_row": df.iloc[int(rec[0])].copy(),
+              "favorites": np.sort(fav).astype(np.int32),
+              "recent": rec.astype(np.int32)}
+    model = SessionModel(FavoriteBits(fav), RecentRing(rec), int(rec[0]))
+    compact = {"user": model}
+    assert np.array_equal(model.favorites.ids(), np.sort(fav)) and np.array_equal(model.recent.ids(), rec)
+
+    print(f"{len(df)} drinks, {n_fav} favorites, {RECENT_CAPACITY} recent")
+    for name, state in (("Series + set/list of str", legacy), ("Series + int32 arrays", arrays),
+                        ("SessionModel", compact)):
+        b = session_bytes(state)
+        print(f"{name:<26}{b:>8} B/session{b * 1000 / 1024 / 1024:>9.2f} MB/1000 sessions")
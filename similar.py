@@ -0,0 +1,93 @@
+# similar.py
+"""
+"비슷하지만 더 가벼운" 음료: 최근접 이웃 인덱스.
+
+- 특징 벡터: 6개 숫자 컬럼 + 100ml 당 환산값(칼로리/카페인/당/지방/나트륨)을 표준화(z-score)하고,
+  카테고리/온도 one-hot 에 가중치를 곱해 붙임 → 같은 카테고리·온도일수록 가까움
+- 카탈로그 로딩 시 float32 행렬 + KD-tree 를 한 번 만들고 세션 간 공유
+  (scipy 가 없으면 같은 행렬에 대한 numpy 전수 거리 계산으로 대체)
+- 질의: 가까운 순으로 후보를 뽑아 당/칼로리/카페인이 하나도 늘지 않고 하나 이상 줄어든 것만 남김
+  (모자라면 후보 수를 늘려 다시)
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:   # 선택 의존성
+    cKDTree = None
+
+FEATURE_COLS = [
+    "Calories (kcal)",
+    "Caffeine (mg)",
+    "Sugar (g)",
+    "Fat (g)",
+    "Sodium (mg)",
+    "Price (KRW)",
+]
+PER_100ML_COLS = ["Calories (kcal)", "Caffeine (mg)", "Sugar (g)", "Fat (g)", "Sodium (mg)"]
+HEALTH_COLS = ["Sugar (g)", "Calories (kcal)", "Caffeine (mg)"]   # "더 가벼운" 판단 기준
+CATEGORY_WEIGHT = 2.0      # 카테고리가 다르면 표준편차 약 2.8 만큼 멀어짐
+TEMPERATURE_WEIGHT = 1.0
+MAX_CANDIDATES = 512       # 후보를 이만큼 늘려도 못 채우면 있는 만큼만
+
+
+def _standardize(x: np.ndarray) -> np.ndarray:
+    mean = np.nanmean(x, axis=0)
+    std = np.nanstd(x, axis=0)
+    std[~(std > 0)] = 1.0
+    return np.nan_to_num((x - mean) / std)
+
+
+def _one_hot(s: pd.Series, weight: float) -> np.ndarray:
+    codes = s.astype("category").cat.codes.to_numpy()
+    n_cats = int(codes.max(initial=-1)) + 1
+    out = np.zeros((len(codes), n_cats), dtype=np.float32)
+    valid = codes >= 0
+    out[np.flatnonzero(valid), codes[valid]] = weight
+    return out
+
+
+def feature_matrix(df: pd.DataFrame) -> np.ndarray:
+    num = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+    vol = df["Volume (ml)"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_100 = df[PER_100ML_COLS].to_numpy(dtype=np.float64) * (100.0 / vol)[:, None]
+    per_100[~np.isfinite(per_100)] = np.nan   # 용량 0/결측 → 평균값(표준화 후 0)
+    return np.hstack([
+        _standardize(num).astype(np.float32),
+        _standardize(per_100).astype(np.float32),
+        _one_hot(df["Category"], CATEGORY_WEIGHT),
+        _one_hot(df["Temperature"], TEMPERATURE_WEIGHT),
+    ])
+
+
+class SimilarIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self.matrix = feature_matrix(df)
+        self.health = df[HEALTH_COLS].to_numpy(dtype=np.float32)
+        self.tree = cKDTree(self.matrix) if cKDTree is not None and self.n_rows else None
+
+    def _nearest(self, pos: int, k: int) -> np.ndarray:
+        """pos 에 가까운 순 행 위치 k 개 (자기 자신 포함)"""
+        k = min(k, self.n_rows)
+        if self.tree is not None:
+            _, idx = self.tree.query(self.matrix[pos], k=k)
+            return np.atleast_1d(idx)
+        d = np.einsum("ij,ij->i", self.matrix - self.matrix[pos], self.matrix - self.matrix[pos])
+        idx = np.argpartition(d, k - 1)[:k]
+        return idx[np.argsort(d[idx], kind="stable")]
+
+    def healthier(self, pos: int, k: int = 3) -> np.ndarray:
+        """pos 와 비슷하면서 당/칼로리/카페인이 늘지 않고 하나 이상 줄어든 음료 k 개 (가까운 순 행 위치)"""
+        base = self.health[pos]
+        n = 8 * k
+        while True:
+            cand = self._nearest(pos, n + 1)
+            h = self.health[cand]
+            ok = (h <= base).all(axis=1) & (h < base).any(axis=1)
+            found = cand[ok]
+            if len(found) >= k or n + 1 >= min(self.n_rows, MAX_CANDIDATES):
+                return found[:k].astype(np.int32)
+            n = min(n * 4, MAX_CANDIDATES - 1)
@@ -0,0 +1,188 @@
+# state_store.py
+"""
+사용자별 상태(즐겨찾기/최근 본 음료/프리셋) 영구 저장소.
+
+- SQLite(WAL) 파일 하나, 익명 사용자 토큰(URL ?u=...)이 키
+  · 토큰은 로그인 없는 bearer 키: ?u= 가 붙은 링크를 받은 사람은 보낸 사람의 즐겨찾기/최근 본 음료/프리셋을
+    그대로 보고 바꿀 수 있음 (링크를 공유하면 상태도 공유됨)
+- 쓰기는 클릭 경로에서 바로 하지 않고 대기열에 모았다가 백그라운드 스레드가 한 트랜잭션으로 반영
+  (같은 사용자의 연속 변경은 마지막 값만 기록 = coalescing)
+- 읽기는 프로세스 내 LRU 에서 먼저 찾고, 없을 때만 DB 조회
+- 앱은 st.cache_resource 로 프로세스당 한 개를 만들어 모든 세션이 연결 하나를 공유
+  (캐시를 비우면 on_release 로 close — 남은 쓰기 반영 후 연결/쓰기 스레드 정리)
+- 프로세스 종료 시 아직 닫히지 않은 저장소는 모듈의 atexit 훅 하나가 모두 close
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_state (
+    token     TEXT PRIMARY KEY,
+    favorites BLOB NOT NULL,
+    recent    BLOB NOT NULL,
+    filters   TEXT NOT NULL,
+    updated   REAL NOT NULL
+)
+"""
+FIELDS = ("favorites", "recent", "filters")
+_open_stores = weakref.WeakSet()   # 종료 시 남은 쓰기를 반영할 저장소 (close() 하면 빠짐)
+
+
+def _empty_state() -> dict:
+    return {
+        "favorites": np.empty(0, dtype=np.int32),
+        "recent": np.empty(0, dtype=np.int32),
+        "filters": {},
+    }
+
+
+def _encode(state: dict) -> tuple:
+    return (
+        np.asarray(state["favorites"], dtype="<i4").tobytes(),
+        np.asarray(state["recent"], dtype="<i4").tobytes(),
+        json.dumps(state["filters"], ensure_ascii=False),
+    )
+
+
+def _decode(favorites: bytes, recent: bytes, filters: str) -> dict:
+    return {
+        "favorites": np.frombuffer(favorites, dtype="<i4").astype(np.int32),
+        "recent": np.frombuffer(recent, dtype="<i4").astype(np.int32),
+        "filters": json.loads(filters or "{}"),
+    }
+
+
+class StateStore:
+    def __init__(self, db_path: Path, flush_interval: float = 0.5, cache_size: int = 4096):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._db_lock = threading.Lock()       # 연결 하나를 여러 스레드가 공유
+
+        self._cache = OrderedDict()            # token → state (LRU)
+        self._cache_size = cache_size
+        self._pending = {}                     # token → state (아직 DB 에 안 쓴 최신값)
+        self._cv = threading.Condition()
+        self._flush_interval = flush_interval
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="state-store-writer", daemon=True)
+        self._writer.start()
+        _open_stores.add(self)
+
+    # ----- 읽기 -----
+    def load(self, token: str) -> dict:
+        """사용자 상태 (없으면 빈 상태). 반환값은 호출자가 바꿔도 되는 사본"""
+        with self._cv:
+            state = self._pending.get(token) or self._cache_get(token)
+        if state is None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT favorites, recent, filters FROM user_state WHERE token = ?", (token,)
+                ).fetchone()
+            state = _decode(*row) if row else _empty_state()
+            with self._cv:
+                self._cache_put(token, state)
+        return {k: (v.copy() if hasattr(v, "copy") else v) for k, v in state.items()}
+
+    # ----- 쓰기 (대기열에만 넣고 바로 반환) -----
+    def save(self, token: str, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unknown state fields: {sorted(unknown)}")
+        with self._cv:
+            base = self._pending.get(token) or self._cache_get(token)
+        if base is None:
+            base = self.load(token)
+        state = dict(base)
+        state.update(fields)
+        with self._cv:
+            self._pending[token] = state
+            self._cache_put(token, state)
+            self._cv.notify()
+
+    def flush(self):
+        """대기 중인 쓰기를 지금 반영 (종료 시/테스트용)"""
+        with self._cv:
+            batch, self._pending = self._pending, {}
+        self._write(batch)
+
+    def close(self):
+        """남은 쓰기 반영 후 쓰기 스레드/연결 정리 (여러 번 불러도 됨)"""
+        with self._cv:
+            if self._closed:
+                return
+            self._closed = True
+            self._cv.notify()
+        _open_stores.discard(self)
+        self._writer.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    # ----- 내부 -----
+    def _cache_get(self, token):
+        state = self._cache.get(token)
+        if state is not None:
+            self._cache.move_to_end(token)
+        return state
+
+    def _cache_put(self, token, state):
+        self._cache[token] = state
+        self._cache.move_to_end(token)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_loop(self):
+        while True:
+            with self._cv:
+                while not self._pending and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+            # 잠깐 모았다가 한 번에 (그 사이 같은 사용자의 변경은 덮어써짐)
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass   # 이번 배치는 _write 가 대기열로 되돌려 둠 → 다음 주기에 재시도
+
+    def _write(self, batch: dict):
+        if not batch:
+            return
+        now = time.time()
+        rows = [(token, *_encode(state), now) for token, state in batch.items()]
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO user_state (token, favorites, recent, filters, updated) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(token) DO UPDATE SET favorites = excluded.favorites, recent = excluded.recent, "
+                    "filters = excluded.filters, updated = excluded.updated",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            with self._db_lock:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            with self._cv:
+                for token, state in batch.items():
+                    self._pending.setdefault(token, state)   # 그 사이 더 새 값이 있으면 그쪽 우선
+            raise
+
+
+@atexit.register
+def _close_open_stores():
+    for store in list(_open_stores):
+        store.close()
@@ -0,0 +1,33 @@
+# tests/conftest.py
+"""
+공용 픽스처. 모듈은 저장소 루트에 평평하게 있으므로 루트를 import 경로에 추가.
+
+- snapshot_manifest: 저장소 CSV → 임시 폴더에 ingest 스냅샷 (item_ids.json 은 사본을 써서 저장소 파일은 그대로)
+- snapshot_catalog: 그 스냅샷을 memory-map 으로 로딩한 카탈로그
+"""
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def snapshot_manifest(tmp_path_factory) -> Path:
+    from ingest import ingest
+
+    tmp = tmp_path_factory.mktemp("data")
+    ids_path = tmp / "item_ids.json"
+    shutil.copy(ROOT / "item_ids.json", ids_path)
+    ingest(ROOT / "smartcup_final_6.csv", tmp / "snapshots", ids_path=ids_path)
+    return tmp / "snapshots" / "current.json"
+
+
+@pytest.fixture(scope="session")
+def snapshot_catalog(snapshot_manifest):
+    from catalog import load_snapshot
+
+    return load_snapshot(snapshot_manifest)
@@ -0,0 +1,78 @@
+# tests/test_backends.py
+"""PandasBackend 와 DuckDBBackend 의 결과(수/전체 순서/페이지/파레토 순위)가 같은지 — 공용 조합 묶음으로 비교"""
+import shutil
+
+import numpy as np
+import pytest
+
+pytest.importorskip("duckdb")
+
+from backends import DuckDBBackend, PandasBackend, make_backend
+from catalog import ID_COL
+from filters import RANGE_COLS
+from pareto import DEFAULT_AXES, RANK_COL
+from query import make_spec
+
+
+def parity_specs(catalog, rng):
+    """기본 화면/검색/카페·카테고리/온도/슬라이더/정렬/즐겨찾기 조합"""
+    df = catalog.df
+    sorts = [(), (("Calories (kcal)", True),), (("Price (KRW)", True),), (("Sugar (g)", False),),
+             (("Caffeine (mg)", True), ("Price (KRW)", False))]
+    queries = ["", "라떼", "아메리카노", "ㅋㅍ", "말차 라떼", "없는음료"]
+    fav = df[ID_COL].to_numpy()[rng.choice(len(df), size=min(20, len(df)), replace=False)]
+    for q in queries:
+        for sort_keys in sorts:
+            yield make_spec(catalog, q=q, sort_keys=sort_keys), None
+        for axes in (DEFAULT_AXES, DEFAULT_AXES[:2], ("Caffeine (mg)", "Fat (g)", "Sodium (mg)", "Sugar (g)")):
+            yield make_spec(catalog, q=q, pareto=axes), None
+    for _ in range(60):
+        ranges = {}
+        for col in rng.choice(RANGE_COLS, size=rng.integers(0, 4), replace=False):
+            hi = catalog.bounds[col]
+            lo = int(rng.integers(0, max(1, hi // 2)))
+            ranges[col] = (lo, int(rng.integers(lo, hi + 1)))
+        cafes = list(rng.choice(catalog.cafes, size=rng.integers(0, 3), replace=False))
+        cats = list(rng.choice(catalog.categories, size=rng.integers(0, 3), replace=False))
+        temp = rng.choice([None, *catalog.temps])
+        favorites = fav if rng.random() < 0.2 else None
+        spec = make_spec(
+            catalog, q=str(rng.choice(queries)), cafes=cafes, categories=cats,
+            temp=None if temp is None else str(temp), ranges=ranges,
+            sort_keys=sorts[rng.integers(len(sorts))], favorites=favorites,
+            pareto=DEFAULT_AXES if rng.random() < 0.2 else (),
+        )
+        yield spec, favorites
+
+
+def test_backends_agree(snapshot_catalog, snapshot_manifest):
+    pandas_be = PandasBackend(snapshot_catalog)
+    duck_be = make_backend("duckdb", snapshot_catalog, snapshot_manifest)
+    assert isinstance(duck_be, DuckDBBackend)
+
+    mismatches = []
+    n = 0
+    for spec, favorites in parity_specs(snapshot_catalog, np.random.default_rng(0)):
+        n += 1
+        a = pandas_be.page(spec, favorites)[ID_COL].to_numpy()
+        b = duck_be.page(spec, favorites)[ID_COL].to_numpy()
+        pa, pb = pandas_be.page(spec, favorites, 6, 6), duck_be.page(spec, favorites, 6, 6)
+        ok = (
+            pandas_be.count(spec, favorites) == duck_be.count(spec, favorites) == len(a)
+            and np.array_equal(a, b)
+            and np.array_equal(pa.index.to_numpy(), pb.index.to_numpy())
+        )
+        if ok and spec.pareto:
+            ok = np.array_equal(pa[RANK_COL].to_numpy(), pb[RANK_COL].to_numpy())
+        if not ok:
+            mismatches.append(f"{spec}: pandas={len(a)} duckdb={len(b)}")
+    assert not mismatches, f"{len(mismatches)}/{n} specs differ:\n" + "\n".join(mismatches[:5])
+
+
+def test_duckdb_data_dir_with_quote(snapshot_catalog, snapshot_manifest, tmp_path):
+    """데이터 폴더 경로에 ' 가 있어도 Parquet 뷰가 만들어짐"""
+    data_dir = tmp_path / "it's data"
+    shutil.copytree(snapshot_manifest.parent, data_dir)
+    backend = make_backend("duckdb", snapshot_catalog, data_dir / "current.json")
+    assert isinstance(backend, DuckDBBackend)
+    assert backend.count(make_spec(snapshot_catalog), None) == len(snapshot_catalog.df)
@@ -0,0 +1,66 @@
+# tests/test_prefetch.py
+"""Prefetcher: 예약/취소/교체가 멈추지 않고 대기 수가 0 으로 돌아오는지, 같은 상태 재예약은 무시되는지"""
+import threading
+import time
+
+from prefetch import Prefetcher
+
+
+def _wait_idle(pf: Prefetcher, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while pf.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pf.stats()
+
+
+def test_cancel_queued_jobs_does_not_deadlock():
+    """워커 하나를 막아 둔 채 대기 작업을 cancel/schedule 로 반복 교체 → 제시간에 끝나고 대기 수 0"""
+    pf = Prefetcher(workers=1, max_pending=64)
+    gate = threading.Event()
+    pf.schedule("blocker", 0, [gate.wait])   # 워커를 붙잡아 이후 작업은 모두 대기열에 남음
+    time.sleep(0.05)
+
+    def churn():
+        for i in range(200):
+            pf.schedule("s", i, [lambda: None] * 6)
+            if i % 2:
+                pf.cancel("s")
+
+    worker = threading.Thread(target=churn, daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+    gate.set()
+    try:
+        assert not worker.is_alive(), "cancel/schedule did not return (deadlock)"
+        stats = _wait_idle(pf)
+        assert stats["pending"] == 0
+        assert stats["cancelled"] > 0
+    finally:
+        pf.shutdown()
+
+
+def test_same_state_is_scheduled_once():
+    pf = Prefetcher(workers=1)
+    ran = []
+    try:
+        for _ in range(3):
+            pf.schedule("s", "state", [lambda: ran.append(1)])
+        stats = _wait_idle(pf)
+        assert ran == [1]
+        assert stats["scheduled"] == stats["done"] == 1
+    finally:
+        pf.shutdown()
+
+
+def test_failed_job_is_counted_and_released():
+    pf = Prefetcher(workers=1)
+
+    def boom():
+        raise RuntimeError("boom")
+
+    try:
+        pf.schedule("s", "state", [boom])
+        stats = _wait_idle(pf)
+        assert stats["failed"] == 1 and stats["pending"] == 0
+    finally:
+        pf.shutdown()